@@ -4,17 +4,23 @@ Example client for testing the Face Detection API
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import sys
 import os
 
 
+# Shared session so consecutive calls reuse the same keep-alive connection
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=3))
+
+
 def test_health_endpoint(base_url: str = "http://localhost:5000"):
     """Test the health endpoint"""
     print("Testing health endpoint...")
     
     try:
-        response = requests.get(f"{base_url}/health")
+        response = _SESSION.get(f"{base_url}/health")
         if response.status_code == 200:
             print(f"✓ Health check passed: {response.json()}")
             return True
@@ -42,7 +48,7 @@ def test_face_detection(image_path: str, base_url: str = "http://localhost:5000"
             files = {'image': f}
             data = {'confidence': 0.6}
             
-            response = requests.post(f"{base_url}/detect", files=files, data=data)
+            response = _SESSION.post(f"{base_url}/detect", files=files, data=data)
             
         if response.status_code == 200:
             result = response.json()
@@ -78,17 +84,22 @@ def test_annotated_detection(image_path: str, output_path: str = "annotated_resu
             files = {'image': f}
             data = {'confidence': 0.6}
             
-            response = requests.post(f"{base_url}/detect-and-annotate", files=files, data=data)
+            response = _SESSION.post(
+                f"{base_url}/detect-and-annotate", files=files, data=data, stream=True
+            )
             
-        if response.status_code == 200:
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
-            print(f"✓ Annotated image saved to: {output_path}")
-            return True
-        else:
-            print(f"✗ Annotated detection failed: {response.status_code}")
-            print(f"  Error: {response.text}")
-            return False
+        with response:
+            if response.status_code == 200:
+                # Write the JPEG in chunks so the body is never fully buffered
+                with open(output_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
+                print(f"✓ Annotated image saved to: {output_path}")
+                return True
+            else:
+                print(f"✗ Annotated detection failed: {response.status_code}")
+                print(f"  Error: {response.text}")
+                return False
             
     except Exception as e:
         print(f"✗ Annotated detection error: {str(e)}")
@@ -1,5 +1,12 @@
 from typing import Dict, Any, Optional
+import os
+import numpy as np
+import orjson
 from ..domain.entities import DetectionResult, FaceDetection
+from ..config import AppConfig
+
+
+_SUPPORTED_EXTENSIONS = AppConfig.SUPPORTED_EXTENSIONS
 
 
 class DetectionResultSerializer:
@@ -23,6 +30,13 @@ class DetectionResultSerializer:
             ]
         }
     
+    @staticmethod
+    def to_json_bytes(result: DetectionResult, **extra_fields: Any) -> bytes:
+        """Serialize DetectionResult straight to JSON bytes using orjson"""
+        data = DetectionResultSerializer.to_dict(result)
+        data.update(extra_fields)
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    
     @staticmethod
     def _face_to_dict(face: FaceDetection) -> Dict[str, Any]:
         """Convert FaceDetection to dictionary"""
@@ -40,9 +54,11 @@ class DetectionResultSerializer:
         }
         
         if face.landmarks:
+            # Convert all points to Python floats in one NumPy pass
+            points = np.asarray(face.landmarks, dtype=np.float64).tolist()
             face_dict["landmarks"] = [
-                {"x": float(point[0]), "y": float(point[1])} 
-                for point in face.landmarks
+                {"x": point[0], "y": point[1]} 
+                for point in points
             ]
         
         if face.emotion:
@@ -73,8 +89,7 @@ class ValidationService:
     @staticmethod
     def validate_image_file(file_path: str) -> bool:
         """Validate if file is a supported image format"""
-        supported_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
-        return any(file_path.lower().endswith(ext) for ext in supported_extensions)
+        return os.path.splitext(file_path)[1].lower() in _SUPPORTED_EXTENSIONS
     
     @staticmethod
     def validate_confidence_threshold(threshold: float) -> bool:
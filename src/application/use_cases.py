@@ -1,13 +1,38 @@
-from typing import Union, Optional
-import time
+from typing import Union, Optional, Tuple, List, Callable
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import hashlib
+import logging
+import multiprocessing
 import os
-import cv2
+import threading
 import numpy as np
 from ..domain.interfaces import FaceDetectorInterface, ImageProcessorInterface, EmotionDetectorInterface, AgeDetectorInterface
-from ..domain.entities import DetectionResult, FaceDetection
+from ..domain.entities import DetectionResult, FaceDetection, EmotionResult, AgeResult
 from ..domain.exceptions import InvalidImageError, FileError
 
 
+logger = logging.getLogger(__name__)
+
+# Per-process use case built by _init_worker for detect_faces_in_images
+_WORKER_USE_CASE = None
+
+
+def _init_worker(
+    face_detector_factory: Callable[[], FaceDetectorInterface],
+    image_processor_factory: Callable[[], ImageProcessorInterface]
+) -> None:
+    """Load the detection model once per worker process"""
+    global _WORKER_USE_CASE
+    _WORKER_USE_CASE = FaceDetectionUseCase(face_detector_factory(), image_processor_factory())
+
+
+def _detect_in_worker(task: Tuple[str, Optional[float]]) -> DetectionResult:
+    """Run face detection for one image inside a worker process"""
+    image_path, confidence_threshold = task
+    return _WORKER_USE_CASE.detect_faces_in_image(image_path, confidence_threshold)
+
+
 class FaceDetectionUseCase:
     """Use case for face detection operations"""
     
@@ -17,13 +42,36 @@ class FaceDetectionUseCase:
         image_processor: ImageProcessorInterface,
         emotion_detector: Optional[EmotionDetectorInterface] = None,
         age_detector: Optional[AgeDetectorInterface] = None,
-        combined_detector: Optional[object] = None  # For DeepFaceCombinedDetector
+        combined_detector: Optional[object] = None,  # For DeepFaceCombinedDetector
+        cache_size: int = 64,
+        analysis_workers: int = 0,
+        face_input_size: Optional[int] = None
     ):
         self._face_detector = face_detector
         self._image_processor = image_processor
         self._emotion_detector = emotion_detector
         self._age_detector = age_detector
         self._combined_detector = combined_detector
+        
+        # LRU cache of results keyed by image content hash and detection options
+        self._cache_size = cache_size
+        self._result_cache: "OrderedDict[tuple, DetectionResult]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        
+        # The threshold lives on the shared face detector, so applying it and running
+        # detection must happen atomically with respect to other request threads
+        self._detector_lock = threading.Lock()
+        
+        # Number of threads for per-face analysis; 0 or 1 uses batched inference instead.
+        # Only enable for detectors that are thread-safe and release the GIL.
+        self._analysis_workers = analysis_workers
+        
+        # When set, each face crop is resized once to this square size and the
+        # same array is shared by the emotion and age detectors
+        self._face_input_size = face_input_size
+        
+        # Output directories already created by detect_and_annotate
+        self._ensured_dirs = set()
     
     def detect_faces_in_image(
         self, 
@@ -44,32 +92,324 @@ class FaceDetectionUseCase:
         Returns:
             DetectionResult with detected faces, emotions, and age (if requested)
         """
-        if not os.path.exists(image_path):
-            raise FileError(f"Image file not found: {image_path}")
+        result, _ = self._detect_with_image(
+            image_path, confidence_threshold, detect_emotions, detect_age, need_image=False
+        )
+        return result
+    
+    def detect_faces_in_array(
+        self,
+        image: np.ndarray,
+        confidence_threshold: Optional[float] = None,
+        detect_emotions: bool = False,
+        detect_age: bool = False
+    ) -> DetectionResult:
+        """
+        Detect faces in an already decoded image
         
-        if confidence_threshold is not None:
-            self._face_detector.set_confidence_threshold(confidence_threshold)
+        Args:
+            image: BGR uint8 image array
+            confidence_threshold: Minimum confidence for face detection
+            detect_emotions: Whether to perform emotion detection on detected faces
+            detect_age: Whether to perform age detection on detected faces
+            
+        Returns:
+            DetectionResult with detected faces, emotions, and age (if requested)
+        """
+        result, _ = self._detect_in_array(image, confidence_threshold, detect_emotions, detect_age)
+        return result
+    
+    def detect_faces_in_bytes(
+        self,
+        image_bytes: bytes,
+        confidence_threshold: Optional[float] = None,
+        detect_emotions: bool = False,
+        detect_age: bool = False
+    ) -> DetectionResult:
+        """
+        Detect faces in an encoded image held in memory, e.g. an uploaded file
+        
+        Args:
+            image_bytes: Encoded image data (JPEG, PNG, ...)
+            confidence_threshold: Minimum confidence for face detection
+            detect_emotions: Whether to perform emotion detection on detected faces
+            detect_age: Whether to perform age detection on detected faces
+            
+        Returns:
+            DetectionResult with detected faces, emotions, and age (if requested)
+        """
+        result, _ = self._detect_with_bytes(
+            image_bytes, "uploaded image", confidence_threshold, detect_emotions, detect_age,
+            need_image=False
+        )
+        return result
+    
+    def detect_faces_in_images(
+        self,
+        image_paths: List[str],
+        confidence_threshold: Optional[float] = None,
+        face_detector_factory: Optional[Callable[[], FaceDetectorInterface]] = None,
+        max_workers: Optional[int] = None,
+        mp_context: Union[str, multiprocessing.context.BaseContext, None] = None
+    ) -> List[DetectionResult]:
+        """
+        Detect faces in multiple image files
+        
+        Args:
+            image_paths: Paths to the image files
+            confidence_threshold: Minimum confidence for face detection
+            face_detector_factory: Picklable callable (e.g. the detector class) that builds
+                a face detector in each worker process. When omitted, images are processed
+                sequentially in this process with the configured detector.
+            max_workers: Number of worker processes (defaults to the CPU count)
+            mp_context: Optional multiprocessing context or start method name,
+                e.g. "spawn" for CUDA-backed models
+            
+        Returns:
+            List of DetectionResult in the same order as image_paths
+        """
+        if face_detector_factory is None or len(image_paths) < 2:
+            return [
+                self.detect_faces_in_image(image_path, confidence_threshold)
+                for image_path in image_paths
+            ]
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(image_paths))
+        if isinstance(mp_context, str):
+            mp_context = multiprocessing.get_context(mp_context)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(face_detector_factory, type(self._image_processor))
+        ) as executor:
+            tasks = [(image_path, confidence_threshold) for image_path in image_paths]
+            return list(executor.map(_detect_in_worker, tasks, chunksize=4))
+    
+    def detect_faces_in_arrays(
+        self,
+        images: List[np.ndarray],
+        confidence_threshold: Optional[float] = None,
+        detect_emotions: bool = False,
+        detect_age: bool = False
+    ) -> List[DetectionResult]:
+        """
+        Detect faces in several decoded images with one batched detector call
+        
+        Args:
+            images: List of BGR uint8 image arrays
+            confidence_threshold: Minimum confidence for face detection
+            detect_emotions: Whether to perform emotion detection on detected faces
+            detect_age: Whether to perform age detection on detected faces
+            
+        Returns:
+            List of DetectionResult in the same order as images
+        """
+        with self._detector_lock:
+            self._apply_threshold(confidence_threshold)
+            results = self._face_detector.detect_faces_batch(images)
+        
+        if detect_emotions or detect_age:
+            results = self._add_facial_analysis_batch(results, images, detect_emotions, detect_age)
+        
+        return results
+    
+    def annotate_image(
+        self,
+        image: np.ndarray,
+        confidence_threshold: Optional[float] = None,
+        detect_emotions: bool = False,
+        detect_age: bool = False
+    ) -> Tuple[DetectionResult, np.ndarray]:
+        """
+        Detect faces in a decoded image and draw the detections on it
+        
+        Args:
+            image: BGR uint8 image array, owned by the caller; it is annotated in place
+            confidence_threshold: Minimum confidence for face detection
+            detect_emotions: Whether to perform emotion detection
+            detect_age: Whether to perform age detection
+            
+        Returns:
+            Tuple of (DetectionResult, annotated image)
+        """
+        result, _ = self._detect_in_array(image, confidence_threshold, detect_emotions, detect_age)
+        annotated_image = self._image_processor.draw_detections(image, result, in_place=True)
+        return result, annotated_image
+    
+    def annotate_image_to_bytes(
+        self,
+        image: np.ndarray,
+        extension: str = '.jpg',
+        confidence_threshold: Optional[float] = None,
+        detect_emotions: bool = False,
+        detect_age: bool = False
+    ) -> Tuple[DetectionResult, bytes]:
+        """
+        Detect faces in a decoded image and return the annotated image as encoded bytes
+        
+        Args:
+            image: BGR uint8 image array, owned by the caller; it is annotated in place
+            extension: Output format, e.g. '.jpg' or '.png'
+            confidence_threshold: Minimum confidence for face detection
+            detect_emotions: Whether to perform emotion detection
+            detect_age: Whether to perform age detection
+            
+        Returns:
+            Tuple of (DetectionResult, encoded annotated image)
+        """
+        result, annotated_image = self.annotate_image(
+            image, confidence_threshold, detect_emotions, detect_age
+        )
+        return result, self._image_processor.encode_image(annotated_image, extension)
+    
+    def _detect_with_image(
+        self,
+        image_path: str,
+        confidence_threshold: Optional[float],
+        detect_emotions: bool,
+        detect_age: bool,
+        need_image: bool
+    ) -> Tuple[DetectionResult, Optional[np.ndarray]]:
+        """
+        Load an image file once and run detection on the decoded array
         
+        Returns:
+            Tuple of (DetectionResult, decoded image). The image is None when it
+            was not needed and the result came from the cache.
+        """
+        # Read the file once; the same bytes feed the cache key and the decoder
+        image_bytes = self._read_image_file(image_path)
+        return self._detect_with_bytes(
+            image_bytes, image_path, confidence_threshold, detect_emotions, detect_age, need_image
+        )
+    
+    def _detect_with_bytes(
+        self,
+        image_bytes: bytes,
+        source: str,
+        confidence_threshold: Optional[float],
+        detect_emotions: bool,
+        detect_age: bool,
+        need_image: bool
+    ) -> Tuple[DetectionResult, Optional[np.ndarray]]:
+        """Decode encoded image bytes once and run detection, using the result cache"""
         try:
-            # Load and validate image
-            image = self._image_processor.load_image(image_path)
+            # Look up under the threshold detection would run with, not the (possibly None) request
+            digest = hashlib.sha1(image_bytes).digest() if self._cache_size > 0 else None
+            lookup_threshold = (
+                confidence_threshold if confidence_threshold is not None
+                else self._face_detector.get_confidence_threshold()
+            )
+            cached = self._get_cached_result(
+                self._get_cache_key(digest, lookup_threshold, detect_emotions, detect_age)
+            )
+            if cached is not None and not need_image:
+                return cached, None
+            
+            # Decode and validate image
+            image = self._image_processor.decode_image(image_bytes)
             if image is None or image.size == 0:
-                raise InvalidImageError(f"Unable to load image: {image_path}")
+                raise InvalidImageError(f"Unable to load image: {source}")
             
-            # Perform face detection
-            result = self._face_detector.detect_faces(image)
+            if cached is not None:
+                return cached, image
             
-            # Perform emotion and/or age detection if requested and available
-            if (detect_emotions or detect_age) and result.faces:
-                result = self._add_facial_analysis(result, image, detect_emotions, detect_age)
-            
-            return result
+            # Store under the threshold detection actually used, which another thread may
+            # have changed since the lookup when none was requested
+            result, used_threshold = self._detect_in_array(
+                image, confidence_threshold, detect_emotions, detect_age
+            )
+            self._store_cached_result(
+                self._get_cache_key(digest, used_threshold, detect_emotions, detect_age), result
+            )
+            return result, image
             
         except Exception as e:
             if isinstance(e, (InvalidImageError, FileError)):
                 raise
             raise InvalidImageError(f"Error processing image: {str(e)}")
     
+    def get_confidence_threshold(self) -> float:
+        """Get the confidence threshold the face detector currently applies"""
+        return self._face_detector.get_confidence_threshold()
+    
+    def _apply_threshold(self, confidence_threshold: Optional[float]) -> float:
+        """
+        Apply a requested threshold to the face detector and return the one detection will use
+        
+        None keeps the detector's current threshold. Callers hold _detector_lock.
+        """
+        if confidence_threshold is not None:
+            self._face_detector.set_confidence_threshold(confidence_threshold)
+        return self._face_detector.get_confidence_threshold()
+    
+    def _detect_in_array(
+        self,
+        image: np.ndarray,
+        confidence_threshold: Optional[float],
+        detect_emotions: bool,
+        detect_age: bool
+    ) -> Tuple[DetectionResult, float]:
+        """
+        Run face detection and optional facial analysis on a decoded image
+        
+        Returns:
+            Tuple of (DetectionResult, confidence threshold the detection ran with)
+        """
+        # Perform face detection; facial analysis does not depend on the threshold
+        with self._detector_lock:
+            used_threshold = self._apply_threshold(confidence_threshold)
+            result = self._face_detector.detect_faces(image)
+        
+        # Perform emotion and/or age detection if requested and available
+        if (detect_emotions or detect_age) and result.faces:
+            result = self._add_facial_analysis(result, image, detect_emotions, detect_age)
+        
+        return result, used_threshold
+    
+    def _read_image_file(self, image_path: str) -> bytes:
+        """Read the raw image file contents"""
+        try:
+            with open(image_path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise FileError(f"Image file not found: {image_path}")
+        except OSError as e:
+            raise FileError(f"Error reading image {image_path}: {str(e)}")
+    
+    def _get_cache_key(
+        self,
+        digest: Optional[bytes],
+        confidence_threshold: float,
+        detect_emotions: bool,
+        detect_age: bool
+    ) -> Optional[tuple]:
+        """Build the result cache key from the image content hash and detection options"""
+        if digest is None:
+            return None
+        return (digest, confidence_threshold, detect_emotions, detect_age)
+    
+    def _get_cached_result(self, cache_key: Optional[tuple]) -> Optional[DetectionResult]:
+        """Return a cached result and mark it as most recently used"""
+        if cache_key is None:
+            return None
+        with self._result_cache_lock:
+            result = self._result_cache.get(cache_key)
+            if result is not None:
+                self._result_cache.move_to_end(cache_key)
+            return result
+    
+    def _store_cached_result(self, cache_key: Optional[tuple], result: DetectionResult) -> None:
+        """Store a result, evicting the least recently used entry when full"""
+        if cache_key is None:
+            return
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = result
+            self._result_cache.move_to_end(cache_key)
+            while len(self._result_cache) > self._cache_size:
+                self._result_cache.popitem(last=False)
+    
     def _add_facial_analysis(
         self, 
         result: DetectionResult, 
@@ -78,57 +418,87 @@ class FaceDetectionUseCase:
         detect_age: bool
     ) -> DetectionResult:
         """Add emotion and/or age detection to face detection results"""
-        updated_faces = []
+        face_images, face_indices = self._extract_face_images(result, image)
+        emotion_results, age_results = self._analyze_faces(face_images, detect_emotions, detect_age)
+        return self._with_analysis(result, face_indices, emotion_results, age_results)
+    
+    def _add_facial_analysis_batch(
+        self,
+        results: List[DetectionResult],
+        images: List[np.ndarray],
+        detect_emotions: bool,
+        detect_age: bool
+    ) -> List[DetectionResult]:
+        """Add emotion and/or age detection to several results, analyzing all their faces together"""
+        face_images = []
+        face_indices_per_image = []
+        for result, image in zip(results, images):
+            image_faces, face_indices = self._extract_face_images(result, image)
+            face_images.extend(image_faces)
+            face_indices_per_image.append(face_indices)
         
-        for face in result.faces:
-            try:
-                # Extract face region
-                x1, y1, x2, y2 = map(int, face.bbox)
-                face_image = image[y1:y2, x1:x2]
-                
-                # Skip if face region is too small
-                if face_image.shape[0] < 10 or face_image.shape[1] < 10:
-                    updated_faces.append(face)
-                    continue
-                
-                emotion_result = None
-                age_result = None
-                
-                # Use combined detector if available and both analyses are requested
-                if (self._combined_detector and detect_emotions and detect_age):
-                    try:
-                        emotion_result, age_result = self._combined_detector.detect_emotion_and_age(face_image)
-                    except Exception as e:
-                        print(f"Warning: Combined detection failed for face: {e}")
-                        # Fall back to individual detectors if available
-                
-                # Fall back to individual detectors if combined detection failed or not available
-                if detect_emotions and emotion_result is None and self._emotion_detector:
-                    try:
-                        emotion_result = self._emotion_detector.detect_emotion(face_image)
-                    except Exception as e:
-                        print(f"Warning: Emotion detection failed for face: {e}")
-                
-                if detect_age and age_result is None and self._age_detector:
-                    try:
-                        age_result = self._age_detector.detect_age(face_image)
-                    except Exception as e:
-                        print(f"Warning: Age detection failed for face: {e}")
-                
-                # Create updated face detection with analysis results
-                updated_face = FaceDetection(
-                    bbox=face.bbox,
-                    confidence=face.confidence,
-                    landmarks=face.landmarks,
-                    emotion=emotion_result,
-                    age=age_result
-                )
-                updated_faces.append(updated_face)
-                
-            except Exception as e:
-                # If analysis fails for this face, keep original
-                print(f"Warning: Facial analysis failed for face: {e}")
-                updated_faces.append(face)
+        if not face_images:
+            return results
+        
+        emotion_results, age_results = self._analyze_faces(face_images, detect_emotions, detect_age)
+        
+        # Hand each image its slice of the pooled analysis results
+        updated_results = []
+        start = 0
+        for result, face_indices in zip(results, face_indices_per_image):
+            end = start + len(face_indices)
+            updated_results.append(self._with_analysis(
+                result, face_indices, emotion_results[start:end], age_results[start:end]
+            ))
+            start = end
+        
+        return updated_results
+    
+    def _analyze_faces(
+        self,
+        face_images: List[np.ndarray],
+        detect_emotions: bool,
+        detect_age: bool
+    ) -> Tuple[List[Optional[EmotionResult]], List[Optional[AgeResult]]]:
+        """Run emotion and/or age detection on face regions, per face or in batches"""
+        if self._analysis_workers > 1 and len(face_images) > 1:
+            # Analyze faces concurrently, one face per task
+            max_workers = min(self._analysis_workers, len(face_images))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self._analyze_one, face_image, detect_emotions, detect_age)
+                    for face_image in face_images
+                ]
+                analyses = [future.result() for future in futures]
+            emotion_results = [emotion for emotion, _ in analyses]
+            age_results = [age for _, age in analyses]
+        else:
+            emotion_results, age_results = self._analyze_batch(face_images, detect_emotions, detect_age)
+        
+        return emotion_results, age_results
+    
+    @staticmethod
+    def _with_analysis(
+        result: DetectionResult,
+        face_indices: List[int],
+        emotion_results: List[Optional[EmotionResult]],
+        age_results: List[Optional[AgeResult]]
+    ) -> DetectionResult:
+        """Return a copy of result with analysis results attached to the faces at face_indices"""
+        if not face_indices:
+            return result
+        
+        # Scatter analysis results back onto the detected faces
+        updated_faces = list(result.faces)
+        for j, i in enumerate(face_indices):
+            face = result.faces[i]
+            updated_faces[i] = FaceDetection(
+                bbox=face.bbox,
+                confidence=face.confidence,
+                landmarks=face.landmarks,
+                emotion=emotion_results[j],
+                age=age_results[j]
+            )
         
         # Return updated result
         return DetectionResult(
@@ -138,6 +508,144 @@ class FaceDetectionUseCase:
             original_image_size=result.original_image_size
         )
     
+    def _extract_face_images(
+        self,
+        result: DetectionResult,
+        image: np.ndarray
+    ) -> Tuple[List[np.ndarray], List[int]]:
+        """Extract face regions large enough to analyze, with their face indices"""
+        face_images = []
+        face_indices = []
+        if not result.faces:
+            return face_images, face_indices
+        
+        # Cast and clip all boxes to the image bounds in one vectorized pass,
+        # so negative detector coordinates cannot wrap around when slicing
+        height, width = image.shape[:2]
+        bboxes = np.asarray([face.bbox for face in result.faces], dtype=np.float64).astype(np.int32)
+        np.clip(bboxes, 0, [width, height, width, height], out=bboxes)
+        
+        for i, (x1, y1, x2, y2) in enumerate(bboxes.tolist()):
+            face_image = image[y1:y2, x1:x2]
+            
+            # Skip if face region is too small
+            if face_image.shape[0] < 10 or face_image.shape[1] < 10:
+                continue
+            
+            if self._face_input_size:
+                face_image = self._image_processor.preprocess_face(face_image, self._face_input_size)
+            
+            face_images.append(face_image)
+            face_indices.append(i)
+        
+        return face_images, face_indices
+    
+    def _analyze_one(
+        self,
+        face_image: np.ndarray,
+        detect_emotions: bool,
+        detect_age: bool
+    ) -> Tuple[Optional[EmotionResult], Optional[AgeResult]]:
+        """Run emotion and/or age detection on a single face region"""
+        emotion_result = None
+        age_result = None
+        
+        # Use combined detector if available and both analyses are requested
+        if self._combined_detector and detect_emotions and detect_age:
+            try:
+                emotion_result, age_result = self._combined_detector.detect_emotion_and_age(face_image)
+            except Exception as e:
+                logger.warning("Combined detection failed for face: %s", e)
+                # Fall back to individual detectors if available
+        
+        # Fall back to individual detectors if combined detection failed or not available
+        def run_emotion():
+            try:
+                return self._emotion_detector.detect_emotion(face_image)
+            except Exception as e:
+                logger.warning("Emotion detection failed for face: %s", e)
+                return None
+        
+        def run_age():
+            try:
+                return self._age_detector.detect_age(face_image)
+            except Exception as e:
+                logger.warning("Age detection failed for face: %s", e)
+                return None
+        
+        emotion_task = run_emotion if detect_emotions and emotion_result is None and self._emotion_detector else None
+        age_task = run_age if detect_age and age_result is None and self._age_detector else None
+        fallback_emotion, fallback_age = self._run_overlapped(emotion_task, age_task)
+        
+        return emotion_result or fallback_emotion, age_result or fallback_age
+    
+    def _analyze_batch(
+        self,
+        face_images: List[np.ndarray],
+        detect_emotions: bool,
+        detect_age: bool
+    ) -> Tuple[List[Optional[EmotionResult]], List[Optional[AgeResult]]]:
+        """Run emotion and/or age detection on all face regions using batch calls"""
+        emotion_results = [None] * len(face_images)
+        age_results = [None] * len(face_images)
+        
+        # Use combined detector if available and both analyses are requested
+        if self._combined_detector and detect_emotions and detect_age:
+            for j, face_image in enumerate(face_images):
+                try:
+                    emotion_results[j], age_results[j] = self._combined_detector.detect_emotion_and_age(face_image)
+                except Exception as e:
+                    logger.warning("Combined detection failed for face: %s", e)
+                    # Fall back to individual detectors if available
+        
+        # Fall back to individual detectors if combined detection failed or not available,
+        # analyzing all remaining faces in a single batch call per detector
+        emotion_pending = [j for j, r in enumerate(emotion_results) if r is None]
+        age_pending = [j for j, r in enumerate(age_results) if r is None]
+        
+        def run_emotions():
+            try:
+                return self._emotion_detector.detect_emotions_batch([face_images[j] for j in emotion_pending])
+            except Exception as e:
+                logger.warning("Emotion detection failed for faces: %s", e)
+                return None
+        
+        def run_ages():
+            try:
+                return self._age_detector.detect_ages_batch([face_images[j] for j in age_pending])
+            except Exception as e:
+                logger.warning("Age detection failed for faces: %s", e)
+                return None
+        
+        emotion_task = run_emotions if detect_emotions and emotion_pending and self._emotion_detector else None
+        age_task = run_ages if detect_age and age_pending and self._age_detector else None
+        emotion_batch, age_batch = self._run_overlapped(emotion_task, age_task)
+        
+        for j, emotion_result in zip(emotion_pending, emotion_batch or []):
+            emotion_results[j] = emotion_result
+        for j, age_result in zip(age_pending, age_batch or []):
+            age_results[j] = age_result
+        
+        return emotion_results, age_results
+    
+    @staticmethod
+    def _run_overlapped(emotion_task, age_task) -> tuple:
+        """
+        Run the emotion and age tasks, overlapping them on two threads when both are needed
+        
+        Either task may be None, in which case its result is None.
+        """
+        if emotion_task and age_task:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                emotion_future = executor.submit(emotion_task)
+                age_future = executor.submit(age_task)
+                return emotion_future.result(), age_future.result()
+        
+        return (
+            emotion_task() if emotion_task else None,
+            age_task() if age_task else None
+        )
+    
     def detect_and_annotate(
         self,
         image_path: str,
@@ -161,17 +669,19 @@ class FaceDetectionUseCase:
         Returns:
             DetectionResult with detected faces, emotions, and age (if requested)
         """
-        # Detect faces (and analyze if requested)
-        result = self.detect_faces_in_image(image_path, confidence_threshold, detect_emotions, detect_age)
-        
-        # Load original image for annotation
-        image = self._image_processor.load_image(image_path)
+        # Detect faces (and analyze if requested), keeping the decoded image for annotation
+        result, image = self._detect_with_image(
+            image_path, confidence_threshold, detect_emotions, detect_age, need_image=True
+        )
         
-        # Draw detections
-        annotated_image = self._image_processor.draw_detections(image, result)
+        # Draw detections directly on the freshly decoded image, which nothing else uses
+        annotated_image = self._image_processor.draw_detections(image, result, in_place=True)
         
         # Save annotated image
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        output_dir = os.path.dirname(output_path)
+        if output_dir and output_dir not in self._ensured_dirs:
+            os.makedirs(output_dir, exist_ok=True)
+            self._ensured_dirs.add(output_dir)
         self._image_processor.save_image(annotated_image, output_path)
         
         return result
@@ -0,0 +1,72 @@
+"""
+Age range and age category rules shared by the age detectors
+"""
+
+from typing import Tuple
+import numpy as np
+
+
+# Labels indexed by age_category_code
+AGE_CATEGORIES = ('child', 'teenager', 'young_adult', 'adult', 'middle_aged', 'senior')
+
+_CATEGORY_BOUNDS = (13, 20, 30, 50, 65)
+
+
+def age_range(estimated_age: float) -> Tuple[int, int]:
+    """Calculate age range based on estimated age"""
+    # Create meaningful age brackets; uncertainty grows with age
+    if estimated_age < 18:
+        # Children/teenagers - smaller range
+        return (max(0, int(estimated_age - 3)), min(25, int(estimated_age + 3)))
+    elif estimated_age < 30:
+        # Young adults
+        return (max(18, int(estimated_age - 4)), min(35, int(estimated_age + 4)))
+    elif estimated_age < 50:
+        # Middle-aged adults
+        return (max(25, int(estimated_age - 5)), min(60, int(estimated_age + 5)))
+    else:
+        # Older adults - larger uncertainty
+        return (max(40, int(estimated_age - 8)), min(120, int(estimated_age + 8)))
+
+
+def age_ranges(estimated_ages: np.ndarray) -> np.ndarray:
+    """
+    Vectorized age_range for a batch of estimated ages
+    
+    Args:
+        estimated_ages: Array of shape (N,) with estimated ages
+    
+    Returns:
+        Array of shape (N, 2) with (min_age, max_age) rows
+    """
+    ages = np.asarray(estimated_ages, dtype=np.float64)
+    
+    # Same brackets as age_range; the default case covers ages >= 50
+    conditions = [ages < 18, ages < 30, ages < 50]
+    min_ages = np.select(
+        conditions,
+        [np.maximum(0, np.trunc(ages - 3)), np.maximum(18, np.trunc(ages - 4)),
+         np.maximum(25, np.trunc(ages - 5))],
+        default=np.maximum(40, np.trunc(ages - 8))
+    )
+    max_ages = np.select(
+        conditions,
+        [np.minimum(25, np.trunc(ages + 3)), np.minimum(35, np.trunc(ages + 4)),
+         np.minimum(60, np.trunc(ages + 5))],
+        default=np.minimum(120, np.trunc(ages + 8))
+    )
+    
+    return np.stack([min_ages, max_ages], axis=1).astype(np.int16)
+
+
+def age_category_code(age: float) -> int:
+    """Index into AGE_CATEGORIES for the estimated age"""
+    for code, bound in enumerate(_CATEGORY_BOUNDS):
+        if age < bound:
+            return code
+    return len(_CATEGORY_BOUNDS)
+
+
+def age_category(age: float) -> str:
+    """Get age category label for the estimated age"""
+    return AGE_CATEGORIES[age_category_code(age)]
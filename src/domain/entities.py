@@ -1,10 +1,10 @@
 from typing import List, Tuple, Optional, Dict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 import numpy as np
 
 
-@dataclass
+@dataclass(slots=True)
 class EmotionResult:
     """Domain entity representing emotion analysis result"""
     emotion: str  # dominant emotion
@@ -12,14 +12,63 @@ class EmotionResult:
     emotions: Dict[str, float]  # all emotion probabilities
 
 
-@dataclass
+@dataclass(slots=True)
 class AgeResult:
     """Domain entity representing age analysis result"""
     age: float  # estimated age
     age_range: Tuple[int, int]  # estimated age range (min, max)
     
 
-@dataclass
+@dataclass(slots=True)
+class EmotionBatchResult:
+    """Structure-of-arrays emotion results for a batch of faces"""
+    labels: Tuple[str, ...]  # emotion label of each score column
+    dominant: np.ndarray  # (N,) int32 index into labels
+    confidence: np.ndarray  # (N,) float32 probability of the dominant emotion
+    scores: np.ndarray  # (N, len(labels)) float32 emotion probabilities
+    
+    def __len__(self) -> int:
+        return len(self.dominant)
+    
+    def dominant_labels(self) -> np.ndarray:
+        """Dominant emotion label of every face as an (N,) string array"""
+        return np.asarray(self.labels)[self.dominant]
+    
+    def to_list(self) -> List[EmotionResult]:
+        """Convert to per-face EmotionResult entities"""
+        return [
+            EmotionResult(
+                emotion=emotion,
+                confidence=confidence,
+                emotions=dict(zip(self.labels, scores))
+            )
+            for emotion, confidence, scores in zip(
+                self.dominant_labels().tolist(), self.confidence.tolist(), self.scores.tolist()
+            )
+        ]
+
+
+@dataclass(slots=True)
+class AgeBatchResult:
+    """Structure-of-arrays age results for a batch of faces"""
+    age: np.ndarray  # (N,) float32 estimated ages
+    range_min: np.ndarray  # (N,) int16 lower bound of the age range
+    range_max: np.ndarray  # (N,) int16 upper bound of the age range
+    
+    def __len__(self) -> int:
+        return len(self.age)
+    
+    def to_list(self) -> List[AgeResult]:
+        """Convert to per-face AgeResult entities"""
+        return [
+            AgeResult(age=age, age_range=(min_age, max_age))
+            for age, min_age, max_age in zip(
+                self.age.tolist(), self.range_min.tolist(), self.range_max.tolist()
+            )
+        ]
+
+
+@dataclass(slots=True)
 class FaceDetection:
     """Domain entity representing a detected face"""
     bbox: Tuple[float, float, float, float]  # (x1, y1, x2, y2)
@@ -28,17 +77,27 @@ class FaceDetection:
     emotion: Optional[EmotionResult] = None  # emotion analysis result
     age: Optional[AgeResult] = None  # age analysis result
     
+    # Derived geometry, computed once from bbox at construction
+    _width: float = field(init=False, repr=False, compare=False)
+    _height: float = field(init=False, repr=False, compare=False)
+    _area: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._width = self.bbox[2] - self.bbox[0]
+        self._height = self.bbox[3] - self.bbox[1]
+        self._area = self._width * self._height
+    
     def get_width(self) -> float:
-        return self.bbox[2] - self.bbox[0]
+        return self._width
     
     def get_height(self) -> float:
-        return self.bbox[3] - self.bbox[1]
+        return self._height
     
     def get_area(self) -> float:
-        return self.get_width() * self.get_height()
+        return self._area
 
 
-@dataclass
+@dataclass(slots=True)
 class DetectionResult:
     """Domain entity representing the result of face detection"""
     image_path: str
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from typing import Union, Optional, List
 import numpy as np
@@ -20,11 +22,30 @@ class FaceDetectorInterface(ABC):
         """
         pass
     
+    def detect_faces_batch(self, images: List[np.ndarray]) -> List[DetectionResult]:
+        """
+        Detect faces in several images
+        
+        Implementations whose model has a native batch axis should override this.
+        
+        Args:
+            images: List of BGR uint8 image arrays
+            
+        Returns:
+            List of DetectionResult in the same order as images
+        """
+        return [self.detect_faces(image) for image in images]
+    
     @abstractmethod
     def set_confidence_threshold(self, threshold: float) -> None:
         """Set the minimum confidence threshold for face detection"""
         pass
     
+    @abstractmethod
+    def get_confidence_threshold(self) -> float:
+        """Get the confidence threshold currently applied to face detection"""
+        pass
+    
     @abstractmethod
     def is_model_loaded(self) -> bool:
         """Check if the detection model is properly loaded"""
@@ -40,7 +61,7 @@ class EmotionDetectorInterface(ABC):
         Detect emotion in a face image
         
         Args:
-            face_image: Numpy array of the cropped face image
+            face_image: Cropped face as a uint8 BGR array of shape (H, W, 3)
             
         Returns:
             EmotionResult containing emotion predictions
@@ -53,7 +74,7 @@ class EmotionDetectorInterface(ABC):
         Detect emotions in multiple face images
         
         Args:
-            face_images: List of numpy arrays of cropped face images
+            face_images: List of cropped faces as uint8 BGR arrays of shape (H, W, 3)
             
         Returns:
             List of EmotionResult for each face
@@ -75,7 +96,7 @@ class AgeDetectorInterface(ABC):
         Detect age in a face image
         
         Args:
-            face_image: Numpy array of the cropped face image
+            face_image: Cropped face as a uint8 BGR array of shape (H, W, 3)
             
         Returns:
             AgeResult containing age predictions
@@ -88,7 +109,7 @@ class AgeDetectorInterface(ABC):
         Detect ages in multiple face images
         
         Args:
-            face_images: List of numpy arrays of cropped face images
+            face_images: List of cropped faces as uint8 BGR arrays of shape (H, W, 3)
             
         Returns:
             List of AgeResult for each face
@@ -109,17 +130,37 @@ class ImageProcessorInterface(ABC):
         """Load an image from file path"""
         pass
     
+    @abstractmethod
+    def decode_image(self, image_bytes: bytes) -> np.ndarray:
+        """Decode an image from encoded file contents (e.g. JPEG/PNG bytes)"""
+        pass
+    
     @abstractmethod
     def save_image(self, image: np.ndarray, output_path: str) -> None:
         """Save an image to file"""
         pass
     
     @abstractmethod
-    def draw_detections(self, image: np.ndarray, detection_result: DetectionResult) -> np.ndarray:
-        """Draw bounding boxes and landmarks on the image"""
+    def encode_image(self, image: np.ndarray, extension: str = '.jpg') -> bytes:
+        """Encode an image to file contents in the format given by extension"""
+        pass
+    
+    @abstractmethod
+    def draw_detections(
+        self,
+        image: np.ndarray,
+        detection_result: DetectionResult,
+        in_place: bool = False
+    ) -> np.ndarray:
+        """Draw bounding boxes and landmarks on the image (on a copy unless in_place is set)"""
         pass
     
     @abstractmethod
     def resize_image(self, image: np.ndarray, target_size: tuple) -> np.ndarray:
         """Resize image to target dimensions"""
         pass
+    
+    @abstractmethod
+    def preprocess_face(self, face_image: np.ndarray, size: int = 224) -> np.ndarray:
+        """Resize a face crop to a square, contiguous uint8 BGR array shared by all analyzers"""
+        pass
@@ -0,0 +1,269 @@
+"""
+Shared helpers for running DeepFace's facial attribute models directly
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Optional, Sequence, Tuple
+import numpy as np
+import cv2
+from deepface import DeepFace
+from ..domain.entities import EmotionBatchResult, EmotionResult
+
+
+# Output order of DeepFace's emotion model
+EMOTION_LABELS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+# DeepFace's age model predicts a distribution over ages 0..100
+AGE_BINS = np.arange(101, dtype=np.float32)
+
+EMOTION_INPUT_SIZE = 48
+AGE_INPUT_SIZE = 224
+
+# Mini-batch size and preprocessing threads for pipelined batch inference
+PIPELINE_BATCH_SIZE = 16
+PREPROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Process-wide preprocessing pool, created on first pipelined batch
+_preprocess_pool: Optional[ThreadPoolExecutor] = None
+_preprocess_pool_lock = threading.Lock()
+
+# Opt-in ONNX Runtime backend (requires the optional onnxruntime and tf2onnx packages)
+USE_ONNX_RUNTIME = os.getenv('DEEPFACE_ONNX_RUNTIME', 'false').lower() == 'true'
+ONNX_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.deepface', 'onnx')
+
+# Preferred execution providers, fastest first; TensorRT runs in FP16
+_ONNX_PROVIDERS = [
+    ('TensorrtExecutionProvider', {'trt_fp16_enable': True, 'trt_engine_cache_enable': True,
+                                   'trt_engine_cache_path': ONNX_CACHE_DIR}),
+    ('CUDAExecutionProvider', {}),
+    ('CPUExecutionProvider', {}),
+]
+
+
+class OnnxRuntimeModel:
+    """ONNX Runtime session standing in for a converted Keras model"""
+    
+    def __init__(self, session: Any):
+        self._session = session
+        self._input_name = session.get_inputs()[0].name
+    
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Run the session on a float32 NHWC batch"""
+        return self._session.run(None, {self._input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+def build_model(model_name: str) -> Any:
+    """
+    Build (or fetch from DeepFace's registry) a facial attribute model
+    
+    Args:
+        model_name: DeepFace model name, e.g. 'Emotion' or 'Age'
+    
+    Returns:
+        The underlying Keras model
+    """
+    try:
+        client = DeepFace.build_model(model_name=model_name, task="facial_attribute")
+    except TypeError:
+        # Older DeepFace releases take only the model name
+        client = DeepFace.build_model(model_name)
+    return getattr(client, "model", client)
+
+
+def to_onnx_runtime(model: Any, model_name: str) -> Any:
+    """
+    Convert a Keras model to an ONNX Runtime session when the backend is enabled
+    
+    The ONNX export (and, on CPU, the optimized graph) is cached under ONNX_CACHE_DIR
+    so conversion and graph optimization only happen on first use.
+    
+    Args:
+        model: Keras model returned by build_model
+        model_name: DeepFace model name, used for the cache file name
+    
+    Returns:
+        An OnnxRuntimeModel, or the original Keras model if the backend is
+        disabled, unavailable or conversion fails
+    """
+    if not USE_ONNX_RUNTIME:
+        return model
+    
+    try:
+        import onnxruntime as ort
+        
+        onnx_path = os.path.join(ONNX_CACHE_DIR, f"{model_name.lower()}.onnx")
+        if not os.path.exists(onnx_path):
+            import tensorflow as tf
+            import tf2onnx
+            
+            os.makedirs(ONNX_CACHE_DIR, exist_ok=True)
+            input_signature = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32),)
+            tf2onnx.convert.from_keras(
+                model, input_signature=input_signature, opset=15, output_path=onnx_path
+            )
+        
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        available_providers = set(ort.get_available_providers())
+        providers = [provider for provider in _ONNX_PROVIDERS if provider[0] in available_providers]
+        
+        model_path = onnx_path
+        if [provider[0] for provider in providers] == ['CPUExecutionProvider']:
+            # On CPU, also cache the optimized graph, keyed by the ONNX Runtime version.
+            # (TensorRT keeps its own engine cache; compiled nodes cannot be serialized.)
+            optimized_path = os.path.join(ONNX_CACHE_DIR, f"{model_name.lower()}.ort{ort.__version__}.onnx")
+            if (os.path.exists(optimized_path)
+                    and os.path.getmtime(optimized_path) >= os.path.getmtime(onnx_path)):
+                model_path = optimized_path
+                session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            else:
+                session_options.optimized_model_filepath = optimized_path
+        
+        session = ort.InferenceSession(model_path, sess_options=session_options, providers=providers)
+        return OnnxRuntimeModel(session)
+    
+    except Exception as e:
+        print(f"Warning: ONNX Runtime backend unavailable for {model_name}, using Keras: {e}")
+        return model
+
+
+def is_valid_face(face_image: Any) -> bool:
+    """Check that a face crop is a non-empty 3-channel uint8 BGR image"""
+    return (
+        isinstance(face_image, np.ndarray)
+        and face_image.ndim == 3
+        and face_image.shape[2] == 3
+        and face_image.dtype == np.uint8
+        and face_image.size > 0
+    )
+
+
+def resize_to_input(image: np.ndarray, size: int) -> np.ndarray:
+    """Resize straight to a model's square input size, using INTER_AREA when shrinking"""
+    height, width = image.shape[:2]
+    if height == size and width == size:
+        return image
+    interpolation = cv2.INTER_AREA if height * width > size * size else cv2.INTER_LINEAR
+    return cv2.resize(image, (size, size), interpolation=interpolation)
+
+
+def preprocess_emotion_face(face_image: np.ndarray) -> np.ndarray:
+    """Convert a validated BGR uint8 face crop to the emotion model input (48, 48, 1) in [0, 1]"""
+    gray = cv2.cvtColor(face_image, cv2.COLOR_BGR2GRAY)
+    gray = resize_to_input(gray, EMOTION_INPUT_SIZE)
+    return gray.astype(np.float32)[:, :, None] / 255.0
+
+
+def preprocess_age_face(face_image: np.ndarray) -> np.ndarray:
+    """Convert a validated BGR uint8 face crop to the age model input (224, 224, 3) in [0, 1]"""
+    resized = resize_to_input(face_image, AGE_INPUT_SIZE)
+    return resized.astype(np.float32) / 255.0
+
+
+def preprocess_combined_face(face_image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build both model inputs from one validated BGR uint8 face crop
+    
+    The crop is resized once to the age input size; the emotion input is derived
+    from that shared 224x224 image, matching DeepFace's own resize-then-grayscale order.
+    
+    Returns:
+        Tuple of (emotion input (48, 48, 1), age input (224, 224, 3)), both in [0, 1]
+    """
+    resized = resize_to_input(face_image, AGE_INPUT_SIZE)
+    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    gray = resize_to_input(gray, EMOTION_INPUT_SIZE)
+    return gray.astype(np.float32)[:, :, None] / 255.0, resized.astype(np.float32) / 255.0
+
+
+def run_model(model: Any, batch: np.ndarray) -> np.ndarray:
+    """Run a Keras model forward pass directly, skipping Model.predict's loop setup"""
+    if isinstance(model, OnnxRuntimeModel):
+        return model.predict(batch)
+    return model(batch, training=False).numpy()
+
+
+def stack_inputs(inputs: Sequence[np.ndarray]) -> np.ndarray:
+    """Stack preprocessed inputs into one float32 batch"""
+    return np.stack(inputs).astype(np.float32, copy=False)
+
+
+def _get_preprocess_pool() -> ThreadPoolExecutor:
+    """Return the shared preprocessing pool, creating it on first use"""
+    global _preprocess_pool
+    with _preprocess_pool_lock:
+        if _preprocess_pool is None:
+            _preprocess_pool = ThreadPoolExecutor(
+                max_workers=PREPROCESS_WORKERS, thread_name_prefix="face-preprocess"
+            )
+        return _preprocess_pool
+
+
+def predict_pipelined(
+    model: Any,
+    face_images: Sequence[np.ndarray],
+    preprocess: Callable[[np.ndarray], np.ndarray],
+    batch_size: int = PIPELINE_BATCH_SIZE
+) -> np.ndarray:
+    """
+    Preprocess faces on worker threads while the model runs on earlier mini-batches
+    
+    OpenCV releases the GIL while resizing, so the next mini-batch is prepared
+    while the current one is in the forward pass. At most 2 * batch_size faces
+    are queued for preprocessing at a time, on a pool shared by all callers.
+    
+    Args:
+        model: Model accepted by run_model
+        face_images: Validated BGR uint8 face crops
+        preprocess: Function mapping one face crop to one model input
+        batch_size: Number of faces per forward pass
+        
+    Returns:
+        Model outputs for all faces, in input order
+    """
+    if len(face_images) <= batch_size:
+        return run_model(model, stack_inputs([preprocess(face_image) for face_image in face_images]))
+    
+    # Keep at most two mini-batches of preprocessing in flight ahead of the model
+    executor = _get_preprocess_pool()
+    remaining = iter(face_images)
+    pending: Deque[Future] = deque()
+    
+    def submit_ahead() -> None:
+        for face_image in islice(remaining, 2 * batch_size - len(pending)):
+            pending.append(executor.submit(preprocess, face_image))
+    
+    outputs = []
+    submit_ahead()
+    while pending:
+        batch = [pending.popleft().result() for _ in range(min(batch_size, len(pending)))]
+        submit_ahead()
+        outputs.append(run_model(model, stack_inputs(batch)))
+    
+    return np.concatenate(outputs)
+
+
+def emotion_result_from_probabilities(probabilities: np.ndarray) -> EmotionResult:
+    """Build an EmotionResult from one row of emotion model probabilities"""
+    return emotion_batch_from_probabilities(np.asarray(probabilities)[None]).to_list()[0]
+
+
+def emotion_batch_from_probabilities(predictions: np.ndarray) -> EmotionBatchResult:
+    """Build an EmotionBatchResult from an (N, 7) array of emotion model probabilities"""
+    scores = np.asarray(predictions, dtype=np.float32)
+    
+    return EmotionBatchResult(
+        labels=tuple(EMOTION_LABELS),
+        dominant=scores.argmax(axis=1).astype(np.int32),
+        confidence=scores.max(axis=1),
+        scores=scores
+    )
+
+
+def estimate_ages(predictions: np.ndarray) -> np.ndarray:
+    """Apparent age as the expectation over the predicted age distribution"""
+    return predictions @ AGE_BINS
@@ -0,0 +1,72 @@
+"""
+Process-wide cache of the DeepFace emotion and age models
+
+Detectors share one loaded (and warmed up) instance of each model, so creating
+several detectors does not load the same weights into TensorFlow more than once.
+"""
+
+import gc
+import threading
+from typing import Any, Dict
+import numpy as np
+from ._deepface_models import (
+    AGE_INPUT_SIZE, EMOTION_INPUT_SIZE, build_model, run_model, to_onnx_runtime
+)
+
+
+_MODELS: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+
+
+def _get_model(model_name: str, warmup_shape: tuple) -> Any:
+    """Load, convert and warm up a model on first use, then return the cached instance"""
+    model = _MODELS.get(model_name)
+    if model is not None:
+        return model
+    
+    with _LOCK:
+        model = _MODELS.get(model_name)
+        if model is None:
+            model = to_onnx_runtime(build_model(model_name), model_name)
+            
+            # Warm up once per process with an in-memory dummy batch
+            run_model(model, np.full((1,) + warmup_shape, 0.5, dtype=np.float32))
+            _MODELS[model_name] = model
+    
+    return model
+
+
+def get_emotion_model() -> Any:
+    """Shared DeepFace emotion model"""
+    return _get_model('Emotion', (EMOTION_INPUT_SIZE, EMOTION_INPUT_SIZE, 1))
+
+
+def get_age_model() -> Any:
+    """Shared DeepFace age model"""
+    return _get_model('Age', (AGE_INPUT_SIZE, AGE_INPUT_SIZE, 3))
+
+
+def release_models() -> None:
+    """
+    Drop the cached models so their memory can be reclaimed once no detector uses them
+    
+    The next get_*_model call loads and warms up the model again.
+    """
+    with _LOCK:
+        _MODELS.clear()
+    
+    try:
+        # DeepFace keeps its own registry of built models; empty it so the weights are released
+        from deepface.modules import modeling
+        for task_models in getattr(modeling, 'cached_models', {}).values():
+            task_models.clear()
+        
+        try:
+            import tf_keras as keras
+        except ImportError:
+            from tensorflow import keras
+        keras.backend.clear_session()
+    except Exception as e:
+        print(f"Warning: could not fully release model memory: {e}")
+    
+    gc.collect()
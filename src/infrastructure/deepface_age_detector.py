@@ -1,13 +1,14 @@
-import os
-import tempfile
 import time
 from typing import List, Dict, Any, Tuple
 import numpy as np
-import cv2
-from deepface import DeepFace
 from ..domain.interfaces import AgeDetectorInterface
-from ..domain.entities import AgeResult
+from ..domain.entities import AgeBatchResult, AgeResult
 from ..domain.exceptions import ModelNotLoadedError, ProcessingError
+from ..domain.age_ranges import age_category, age_range, age_ranges
+from ._model_cache import get_age_model
+from ._deepface_models import (
+    estimate_ages, is_valid_face, predict_pipelined, preprocess_age_face, run_model
+)
 
 
 class DeepFaceAgeDetector(AgeDetectorInterface):
@@ -22,100 +23,44 @@ class DeepFaceAgeDetector(AgeDetectorInterface):
         """
         self._model_name = model_name
         self._model_loaded = False
+        self._age_model = None
         self._initialize_model()
     
     def _initialize_model(self) -> None:
         """Initialize the DeepFace age model"""
         try:
-            # Pre-load the model by running a dummy prediction
-            dummy_face = np.ones((48, 48, 3), dtype=np.uint8) * 128
-            
-            # Save dummy image temporarily
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                cv2.imwrite(tmp_file.name, dummy_face)
-                
-                try:
-                    # This will download and initialize the model
-                    DeepFace.analyze(
-                        img_path=tmp_file.name,
-                        actions=['age'],
-                        enforce_detection=False,
-                        silent=True
-                    )
-                    self._model_loaded = True
-                except Exception as e:
-                    print(f"Warning: Could not pre-load age model: {e}")
-                    # Still mark as loaded since DeepFace handles lazy loading
-                    self._model_loaded = True
-                finally:
-                    # Clean up temporary file
-                    try:
-                        os.unlink(tmp_file.name)
-                    except:
-                        pass
-                        
+            # Use the process-wide model, loaded and warmed up on first use,
+            # bypassing DeepFace.analyze's per-call detection and routing
+            self._age_model = get_age_model()
+            self._model_loaded = True
+        
         except Exception as e:
             raise ModelNotLoadedError(f"Failed to initialize DeepFace age model: {str(e)}")
     
+    def _predict_age(self, face_image: np.ndarray) -> float:
+        """Run the age model on a single BGR face and return the apparent age"""
+        face_input = preprocess_age_face(face_image)
+        return float(estimate_ages(run_model(self._age_model, face_input[None]))[0])
+    
     def detect_age(self, face_image: np.ndarray) -> AgeResult:
         """Detect age in a single face image"""
         if not self._model_loaded:
             raise ModelNotLoadedError("DeepFace age model is not loaded")
         
         try:
-            # Ensure the face image is in the correct format
-            if len(face_image.shape) == 3 and face_image.shape[2] == 3:
-                # Convert BGR to RGB if needed (DeepFace expects RGB)
-                if face_image.dtype == np.uint8:
-                    face_rgb = cv2.cvtColor(face_image, cv2.COLOR_BGR2RGB)
-                else:
-                    face_rgb = face_image
-            else:
-                raise ProcessingError("Face image must be a 3-channel RGB image")
+            # Face crops must be uint8 BGR images (as produced by OpenCV)
+            if not is_valid_face(face_image):
+                raise ProcessingError("Face image must be a non-empty 3-channel uint8 BGR image")
             
-            # Resize face to minimum size (DeepFace requires at least 48x48)
-            h, w = face_rgb.shape[:2]
-            if h < 48 or w < 48:
-                target_size = max(48, max(h, w))
-                face_rgb = cv2.resize(face_rgb, (target_size, target_size))
+            # Calculate age range (±5 years is common for age estimation uncertainty)
+            estimated_age = self._predict_age(face_image)
+            age_range = self._calculate_age_range(estimated_age)
+            
+            return AgeResult(
+                age=estimated_age,
+                age_range=age_range
+            )
             
-            # Save face image temporarily for DeepFace analysis
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                # Convert RGB back to BGR for cv2.imwrite
-                face_bgr = cv2.cvtColor(face_rgb, cv2.COLOR_RGB2BGR)
-                cv2.imwrite(tmp_file.name, face_bgr)
-                
-                try:
-                    # Analyze age
-                    result = DeepFace.analyze(
-                        img_path=tmp_file.name,
-                        actions=['age'],
-                        enforce_detection=False,
-                        silent=True
-                    )
-                    
-                    # Handle single face result
-                    if isinstance(result, list):
-                        age_data = result[0]['age']
-                    else:
-                        age_data = result['age']
-                    
-                    # Calculate age range (±5 years is common for age estimation uncertainty)
-                    estimated_age = float(age_data)
-                    age_range = self._calculate_age_range(estimated_age)
-                    
-                    return AgeResult(
-                        age=estimated_age,
-                        age_range=age_range
-                    )
-                    
-                finally:
-                    # Clean up temporary file
-                    try:
-                        os.unlink(tmp_file.name)
-                    except:
-                        pass
-                        
         except Exception as e:
             if isinstance(e, (ModelNotLoadedError, ProcessingError)):
                 raise
@@ -123,53 +68,69 @@ class DeepFaceAgeDetector(AgeDetectorInterface):
     
     def _calculate_age_range(self, estimated_age: float) -> Tuple[int, int]:
         """Calculate age range based on estimated age"""
-        # Standard age estimation uncertainty is typically ±5-8 years
-        uncertainty = 6
+        return age_range(estimated_age)
+    
+    def detect_ages_batch(self, face_images: List[np.ndarray]) -> List[AgeResult]:
+        """Detect ages in multiple face images with pipelined, mini-batched model forward passes"""
+        return self.detect_ages_batch_arrays(face_images).to_list()
+    
+    def detect_ages_batch_arrays(self, face_images: List[np.ndarray]) -> AgeBatchResult:
+        """
+        Detect ages in multiple face images as structure-of-arrays results
+        
+        Args:
+            face_images: List of BGR uint8 face crops
+            
+        Returns:
+            AgeBatchResult with one row per face; invalid face crops hold the default age
+            
+        Raises:
+            ProcessingError: If the batched model forward pass fails
+        """
+        if not self._model_loaded:
+            raise ModelNotLoadedError("DeepFace age model is not loaded")
         
-        min_age = max(0, int(estimated_age - uncertainty))
-        max_age = min(120, int(estimated_age + uncertainty))  # Cap at reasonable maximum age
+        # Start every row at the default and overwrite the faces that get predicted
+        batch = self._default_age_batch(len(face_images))
         
-        # Create meaningful age brackets
-        if estimated_age < 18:
-            # Children/teenagers - smaller range
-            uncertainty = 3
-            min_age = max(0, int(estimated_age - uncertainty))
-            max_age = min(25, int(estimated_age + uncertainty))
-        elif estimated_age < 30:
-            # Young adults
-            min_age = max(18, int(estimated_age - 4))
-            max_age = min(35, int(estimated_age + 4))
-        elif estimated_age < 50:
-            # Middle-aged adults
-            min_age = max(25, int(estimated_age - 5))
-            max_age = min(60, int(estimated_age + 5))
-        else:
-            # Older adults - larger uncertainty
-            uncertainty = 8
-            min_age = max(40, int(estimated_age - uncertainty))
-            max_age = min(120, int(estimated_age + uncertainty))
+        # Preprocess only the faces that pass validation; the rest keep default results
+        valid_mask = np.fromiter(
+            (is_valid_face(face_image) for face_image in face_images),
+            dtype=bool, count=len(face_images)
+        )
+        batch_indices = np.flatnonzero(valid_mask)
         
-        return (min_age, max_age)
-    
-    def detect_ages_batch(self, face_images: List[np.ndarray]) -> List[AgeResult]:
-        """Detect ages in multiple face images"""
-        results = []
-        for face_image in face_images:
+        if len(batch_indices):
             try:
-                age_result = self.detect_age(face_image)
-                results.append(age_result)
-            except Exception as e:
-                # Create a default result for failed detections
-                # Use a neutral age with wide range
-                default_age = 30.0
-                default_range = (18, 65)
-                
-                results.append(AgeResult(
-                    age=default_age,
-                    age_range=default_range
+                estimated_ages = estimate_ages(predict_pipelined(
+                    self._age_model, [face_images[i] for i in batch_indices], preprocess_age_face
                 ))
+                batch_age_ranges = age_ranges(estimated_ages)
+                batch.age[batch_indices] = estimated_ages
+                batch.range_min[batch_indices] = batch_age_ranges[:, 0]
+                batch.range_max[batch_indices] = batch_age_ranges[:, 1]
+            except Exception as e:
+                raise ProcessingError(f"Error during batch age detection: {str(e)}")
         
-        return results
+        return batch
+    
+    def _default_age_batch(self, count: int) -> AgeBatchResult:
+        """Create a batch of default results for failed detections"""
+        default_result = self._default_age_result()
+        
+        return AgeBatchResult(
+            age=np.full(count, default_result.age, dtype=np.float32),
+            range_min=np.full(count, default_result.age_range[0], dtype=np.int16),
+            range_max=np.full(count, default_result.age_range[1], dtype=np.int16)
+        )
+    
+    def _default_age_result(self) -> AgeResult:
+        """Create a default result for failed detections"""
+        # Use a neutral age with wide range
+        return AgeResult(
+            age=30.0,
+            age_range=(18, 65)
+        )
     
     def is_model_loaded(self) -> bool:
         """Check if the age detection model is loaded"""
@@ -177,15 +138,4 @@ class DeepFaceAgeDetector(AgeDetectorInterface):
     
     def get_age_category(self, age: float) -> str:
         """Get age category label for the estimated age"""
-        if age < 13:
-            return "child"
-        elif age < 20:
-            return "teenager"
-        elif age < 30:
-            return "young_adult"
-        elif age < 50:
-            return "adult"
-        elif age < 65:
-            return "middle_aged"
-        else:
-            return "senior"
+        return age_category(age)
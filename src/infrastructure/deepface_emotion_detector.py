@@ -1,13 +1,14 @@
-import os
-import tempfile
 import time
 from typing import List, Dict, Any
 import numpy as np
-import cv2
-from deepface import DeepFace
 from ..domain.interfaces import EmotionDetectorInterface
-from ..domain.entities import EmotionResult
+from ..domain.entities import EmotionBatchResult, EmotionResult
 from ..domain.exceptions import ModelNotLoadedError, ProcessingError
+from ._model_cache import get_emotion_model
+from ._deepface_models import (
+    emotion_batch_from_probabilities, emotion_result_from_probabilities, is_valid_face,
+    predict_pipelined, preprocess_emotion_face, run_model
+)
 
 
 class DeepFaceEmotionDetector(EmotionDetectorInterface):
@@ -22,6 +23,7 @@ class DeepFaceEmotionDetector(EmotionDetectorInterface):
         """
         self._model_name = model_name
         self._model_loaded = False
+        self._emotion_model = None
         self._emotion_labels = [
             'angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral'
         ]
@@ -30,125 +32,103 @@ class DeepFaceEmotionDetector(EmotionDetectorInterface):
     def _initialize_model(self) -> None:
         """Initialize the DeepFace emotion model"""
         try:
-            # Pre-load the model by running a dummy prediction
-            dummy_face = np.ones((48, 48, 3), dtype=np.uint8) * 128
-            
-            # Save dummy image temporarily
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                cv2.imwrite(tmp_file.name, dummy_face)
-                
-                try:
-                    # This will download and initialize the model
-                    DeepFace.analyze(
-                        img_path=tmp_file.name,
-                        actions=['emotion'],
-                        enforce_detection=False,
-                        silent=True
-                    )
-                    self._model_loaded = True
-                except Exception as e:
-                    print(f"Warning: Could not pre-load emotion model: {e}")
-                    # Still mark as loaded since DeepFace handles lazy loading
-                    self._model_loaded = True
-                finally:
-                    # Clean up temporary file
-                    try:
-                        os.unlink(tmp_file.name)
-                    except:
-                        pass
-                        
+            # Use the process-wide model, loaded and warmed up on first use,
+            # bypassing DeepFace.analyze's per-call detection and routing
+            self._emotion_model = get_emotion_model()
+            self._model_loaded = True
+        
         except Exception as e:
             raise ModelNotLoadedError(f"Failed to initialize DeepFace emotion model: {str(e)}")
     
+    def _predict_emotion(self, face_image: np.ndarray) -> np.ndarray:
+        """Run the emotion model on a single BGR face and return its probabilities"""
+        face_input = preprocess_emotion_face(face_image)
+        return run_model(self._emotion_model, face_input[None])[0]
+    
     def detect_emotion(self, face_image: np.ndarray) -> EmotionResult:
         """Detect emotion in a single face image"""
         if not self._model_loaded:
             raise ModelNotLoadedError("DeepFace emotion model is not loaded")
         
         try:
-            # Ensure the face image is in the correct format
-            if len(face_image.shape) == 3 and face_image.shape[2] == 3:
-                # Convert BGR to RGB if needed (DeepFace expects RGB)
-                if face_image.dtype == np.uint8:
-                    face_rgb = cv2.cvtColor(face_image, cv2.COLOR_BGR2RGB)
-                else:
-                    face_rgb = face_image
-            else:
-                raise ProcessingError("Face image must be a 3-channel RGB image")
+            # Face crops must be uint8 BGR images (as produced by OpenCV)
+            if not is_valid_face(face_image):
+                raise ProcessingError("Face image must be a non-empty 3-channel uint8 BGR image")
             
-            # Resize face to minimum size (DeepFace requires at least 48x48)
-            h, w = face_rgb.shape[:2]
-            if h < 48 or w < 48:
-                target_size = max(48, max(h, w))
-                face_rgb = cv2.resize(face_rgb, (target_size, target_size))
-            
-            # Save face image temporarily for DeepFace analysis
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                # Convert RGB back to BGR for cv2.imwrite
-                face_bgr = cv2.cvtColor(face_rgb, cv2.COLOR_RGB2BGR)
-                cv2.imwrite(tmp_file.name, face_bgr)
-                
-                try:
-                    # Analyze emotion
-                    result = DeepFace.analyze(
-                        img_path=tmp_file.name,
-                        actions=['emotion'],
-                        enforce_detection=False,
-                        silent=True
-                    )
-                    
-                    # Handle single face result
-                    if isinstance(result, list):
-                        emotion_data = result[0]['emotion']
-                    else:
-                        emotion_data = result['emotion']
-                    
-                    # Find dominant emotion
-                    dominant_emotion = max(emotion_data, key=emotion_data.get)
-                    dominant_confidence = emotion_data[dominant_emotion] / 100.0  # Convert percentage to decimal
-                    
-                    # Normalize all emotion scores to 0-1 range
-                    normalized_emotions = {
-                        emotion: score / 100.0 for emotion, score in emotion_data.items()
-                    }
-                    
-                    return EmotionResult(
-                        emotion=dominant_emotion,
-                        confidence=dominant_confidence,
-                        emotions=normalized_emotions
-                    )
-                    
-                finally:
-                    # Clean up temporary file
-                    try:
-                        os.unlink(tmp_file.name)
-                    except:
-                        pass
-                        
+            probabilities = self._predict_emotion(face_image)
+            return emotion_result_from_probabilities(probabilities)
+        
         except Exception as e:
             if isinstance(e, (ModelNotLoadedError, ProcessingError)):
                 raise
             raise ProcessingError(f"Error during emotion detection: {str(e)}")
     
     def detect_emotions_batch(self, face_images: List[np.ndarray]) -> List[EmotionResult]:
-        """Detect emotions in multiple face images"""
-        results = []
-        for face_image in face_images:
+        """Detect emotions in multiple face images with pipelined, mini-batched model forward passes"""
+        return self.detect_emotions_batch_arrays(face_images).to_list()
+    
+    def detect_emotions_batch_arrays(self, face_images: List[np.ndarray]) -> EmotionBatchResult:
+        """
+        Detect emotions in multiple face images as structure-of-arrays results
+        
+        Args:
+            face_images: List of BGR uint8 face crops
+            
+        Returns:
+            EmotionBatchResult with one row per face; invalid face crops hold the neutral default
+            
+        Raises:
+            ProcessingError: If the batched model forward pass fails
+        """
+        if not self._model_loaded:
+            raise ModelNotLoadedError("DeepFace emotion model is not loaded")
+        
+        # Start every row at the neutral default and overwrite the faces that get predicted
+        batch = self._default_emotion_batch(len(face_images))
+        
+        # Preprocess only the faces that pass validation; the rest keep default results
+        valid_mask = np.fromiter(
+            (is_valid_face(face_image) for face_image in face_images),
+            dtype=bool, count=len(face_images)
+        )
+        batch_indices = np.flatnonzero(valid_mask)
+        
+        if len(batch_indices):
             try:
-                emotion_result = self.detect_emotion(face_image)
-                results.append(emotion_result)
-            except Exception as e:
-                # Create a default result for failed detections
-                default_emotions = {emotion: 0.0 for emotion in self._emotion_labels}
-                default_emotions['neutral'] = 1.0
-                
-                results.append(EmotionResult(
-                    emotion='neutral',
-                    confidence=0.0,
-                    emotions=default_emotions
+                predictions = emotion_batch_from_probabilities(predict_pipelined(
+                    self._emotion_model, [face_images[i] for i in batch_indices], preprocess_emotion_face
                 ))
+                batch.dominant[batch_indices] = predictions.dominant
+                batch.confidence[batch_indices] = predictions.confidence
+                batch.scores[batch_indices] = predictions.scores
+            except Exception as e:
+                raise ProcessingError(f"Error during batch emotion detection: {str(e)}")
+        
+        return batch
+    
+    def _default_emotion_batch(self, count: int) -> EmotionBatchResult:
+        """Create a batch of default results for failed detections"""
+        neutral_index = self._emotion_labels.index('neutral')
+        scores = np.zeros((count, len(self._emotion_labels)), dtype=np.float32)
+        scores[:, neutral_index] = 1.0
+        
+        return EmotionBatchResult(
+            labels=tuple(self._emotion_labels),
+            dominant=np.full(count, neutral_index, dtype=np.int32),
+            confidence=np.zeros(count, dtype=np.float32),
+            scores=scores
+        )
+    
+    def _default_emotion_result(self) -> EmotionResult:
+        """Create a default result for failed detections"""
+        default_emotions = {emotion: 0.0 for emotion in self._emotion_labels}
+        default_emotions['neutral'] = 1.0
         
-        return results
+        return EmotionResult(
+            emotion='neutral',
+            confidence=0.0,
+            emotions=default_emotions
+        )
     
     def is_model_loaded(self) -> bool:
         """Check if the emotion detection model is loaded"""
@@ -1,5 +1,6 @@
+import threading
 import time
-from typing import Union, List, Tuple
+from typing import Union, List, Optional, Tuple
 import numpy as np
 import cv2
 from mtcnn import MTCNN
@@ -8,11 +9,53 @@ from ..domain.entities import DetectionResult, FaceDetection
 from ..domain.exceptions import ModelNotLoadedError, ProcessingError, InvalidImageError
 
 
+# Landmark order stored in FaceDetection.landmarks
+LANDMARK_KEYS = ('left_eye', 'right_eye', 'nose', 'mouth_left', 'mouth_right')
+
+# MTCNN's own final-stage (ONet) score threshold
+MTCNN_ONET_THRESHOLD = 0.8
+
+# Process-wide MTCNN networks, shared by every detector instance
+_MTCNN_MODEL = None
+_MTCNN_LOCK = threading.Lock()
+
+
+def _get_mtcnn() -> MTCNN:
+    """Load MTCNN's networks on first use, then return the shared instance"""
+    global _MTCNN_MODEL
+    if _MTCNN_MODEL is not None:
+        return _MTCNN_MODEL
+    
+    with _MTCNN_LOCK:
+        if _MTCNN_MODEL is None:
+            _MTCNN_MODEL = MTCNN()
+    
+    return _MTCNN_MODEL
+
+
+def release_mtcnn() -> None:
+    """Drop the shared MTCNN instance; the next detector created loads it again"""
+    global _MTCNN_MODEL
+    with _MTCNN_LOCK:
+        _MTCNN_MODEL = None
+
+
 class MTCNNFaceDetector(FaceDetectorInterface):
     """MTCNN implementation of face detection"""
     
-    def __init__(self, confidence_threshold: float = 0.5):
+    def __init__(self, confidence_threshold: float = 0.5, max_input_side: Optional[int] = None):
+        """
+        Initialize MTCNN face detector
+        
+        Args:
+            confidence_threshold: Minimum confidence for detected faces
+            max_input_side: Images whose longer side exceeds this are downscaled before
+                detection; boxes and landmarks are mapped back to the original frame.
+                Faster on large photos, but faces that shrink below MTCNN's minimum face
+                size are missed. None (the default) disables the downscale.
+        """
         self._confidence_threshold = confidence_threshold
+        self._max_input_side = max_input_side
         self._model_loaded = False
         self._detector = None
         self._initialize_model()
@@ -20,7 +63,8 @@ class MTCNNFaceDetector(FaceDetectorInterface):
     def _initialize_model(self) -> None:
         """Initialize the MTCNN model"""
         try:
-            self._detector = MTCNN()
+            # The confidence threshold is applied per detector, so the networks can be shared
+            self._detector = _get_mtcnn()
             self._model_loaded = True
         except Exception as e:
             raise ModelNotLoadedError(f"Failed to initialize MTCNN model: {str(e)}")
@@ -39,68 +83,146 @@ class MTCNNFaceDetector(FaceDetectorInterface):
                 img_array = cv2.imread(image)
                 if img_array is None:
                     raise InvalidImageError(f"Could not load image: {image}")
+                image_size = (img_array.shape[1], img_array.shape[0])
+                img_array, scale = self._downscale(img_array)
                 # Convert BGR to RGB for MTCNN
-                img_array = cv2.cvtColor(img_array, cv2.COLOR_BGR2RGB)
+                img_array = self._to_rgb(img_array)
             else:
                 image_path = "numpy_array"
-                img_array = image.copy()
+                image_size = (image.shape[1], image.shape[0])
+                img_array, scale = self._downscale(image)
                 # Ensure RGB format
                 if len(img_array.shape) == 3 and img_array.shape[2] == 3:
                     # Assume BGR from OpenCV, convert to RGB
-                    img_array = cv2.cvtColor(img_array, cv2.COLOR_BGR2RGB)
-            
-            image_size = (img_array.shape[1], img_array.shape[0])  # (width, height)
+                    img_array = self._to_rgb(img_array)
             
             # Detect faces
-            detections = self._detector.detect_faces(img_array)
-            
-            # Convert detections to domain entities
-            faces = []
-            for detection in detections:
-                if detection['confidence'] >= self._confidence_threshold:
-                    face = self._convert_detection(detection)
-                    faces.append(face)
-            
-            processing_time = time.time() - start_time
+            detections = self._detector.detect_faces(img_array, threshold_onet=self._onet_threshold())
             
-            return DetectionResult(
-                image_path=image_path,
-                faces=faces,
-                processing_time=processing_time,
-                original_image_size=image_size
-            )
+            return self._build_result(image_path, image_size, scale, detections, time.time() - start_time)
             
         except Exception as e:
             if isinstance(e, (ModelNotLoadedError, InvalidImageError)):
                 raise
             raise ProcessingError(f"Error during face detection: {str(e)}")
     
-    def _convert_detection(self, detection: dict) -> FaceDetection:
-        """Convert MTCNN detection to domain entity"""
-        # MTCNN returns: {'box': [x, y, w, h], 'confidence': float, 'keypoints': {...}}
-        box = detection['box']
+    def detect_faces_batch(self, images: List[np.ndarray]) -> List[DetectionResult]:
+        """Detect faces in several BGR images with one batched MTCNN call"""
+        if not self._model_loaded:
+            raise ModelNotLoadedError("MTCNN model is not loaded")
+        
+        if len(images) < 2:
+            return [self.detect_faces(image) for image in images]
+        
+        start_time = time.time()
+        
+        try:
+            # Convert BGR to RGB for MTCNN; it stacks the list into one batch internally.
+            # As in detect_faces, only 3-channel images are assumed to be BGR.
+            downscaled = [self._downscale(image) for image in images]
+            img_arrays = [
+                self._to_rgb(img_array)
+                if len(img_array.shape) == 3 and img_array.shape[2] == 3 else img_array
+                for img_array, _ in downscaled
+            ]
+            batch_detections = self._detector.detect_faces(img_arrays, threshold_onet=self._onet_threshold())
+            
+            processing_time = time.time() - start_time
+            return [
+                self._build_result(
+                    "numpy_array", (image.shape[1], image.shape[0]), scale, detections, processing_time
+                )
+                for image, (_, scale), detections in zip(images, downscaled, batch_detections)
+            ]
+            
+        except Exception as e:
+            raise ProcessingError(f"Error during batch face detection: {str(e)}")
+    
+    def warm_up(self) -> None:
+        """Run one dummy detection so TensorFlow builds MTCNN's graphs before real traffic"""
+        self.detect_faces(np.zeros((160, 160, 3), dtype=np.uint8))
+    
+    def _downscale(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Shrink an image so its longer side is at most max_input_side, returning it with the scale used"""
+        height, width = image.shape[:2]
+        longest_side = max(height, width)
+        if self._max_input_side is None or longest_side <= self._max_input_side:
+            return image, 1.0
+        
+        scale = self._max_input_side / longest_side
+        resized = cv2.resize(
+            image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA
+        )
+        return resized, scale
+    
+    @staticmethod
+    def _to_rgb(image: np.ndarray) -> np.ndarray:
+        """
+        BGR to RGB as a reversed-channel view
+        
+        The swap is a pure permutation, so no pixels are written here; MTCNN's single
+        tensor conversion materializes the RGB data. The caller's array is not modified.
+        """
+        return image[..., ::-1]
+    
+    def _build_result(
+        self,
+        image_path: str,
+        image_size: Tuple[int, int],
+        scale: float,
+        detections: List[dict],
+        processing_time: float
+    ) -> DetectionResult:
+        """
+        Filter MTCNN detections by confidence and wrap them in a DetectionResult
         
-        # Convert [x, y, w, h] to [x1, y1, x2, y2]
-        bbox = (
-            float(box[0]),  # x1
-            float(box[1]),  # y1
-            float(box[0] + box[2]),  # x2
-            float(box[1] + box[3])   # y2
+        Args:
+            image_path: Source path, or "numpy_array" for in-memory images
+            image_size: Original (width, height), before any downscale
+            scale: Downscale factor applied before detection; coordinates are divided by it
+            detections: Raw MTCNN detections for the image
+            processing_time: Detection time in seconds
+        """
+        # Filter by confidence with one vector comparison
+        scores = np.fromiter(
+            (detection['confidence'] for detection in detections),
+            dtype=np.float64, count=len(detections)
         )
+        keep = np.flatnonzero(scores >= self._confidence_threshold).tolist()
         
-        confidence = float(detection['confidence'])
+        # Convert all kept [x, y, w, h] boxes to [x1, y1, x2, y2] at once
+        boxes = np.asarray([detections[i]['box'] for i in keep], dtype=np.float64).reshape(-1, 4)
+        boxes[:, 2:] += boxes[:, :2]
+        boxes /= scale
         
-        # Extract landmarks if available
+        # Convert detections to domain entities
+        faces = [
+            self._convert_detection(detections[i], tuple(bbox), confidence, scale)
+            for i, bbox, confidence in zip(keep, boxes.tolist(), scores[keep].tolist())
+        ]
+        
+        return DetectionResult(
+            image_path=image_path,
+            faces=faces,
+            processing_time=processing_time,
+            original_image_size=image_size
+        )
+    
+    def _convert_detection(
+        self,
+        detection: dict,
+        bbox: Tuple[float, float, float, float],
+        confidence: float,
+        scale: float = 1.0
+    ) -> FaceDetection:
+        """Convert MTCNN detection with its precomputed (x1, y1, x2, y2) box to domain entity"""
+        # MTCNN returns: {'box': [x, y, w, h], 'confidence': float, 'keypoints': {...}}
+        # Extract landmarks if available, in a fixed key order with one vector cast
         landmarks = None
         if 'keypoints' in detection:
             keypoints = detection['keypoints']
-            landmarks = [
-                (float(keypoints['left_eye'][0]), float(keypoints['left_eye'][1])),
-                (float(keypoints['right_eye'][0]), float(keypoints['right_eye'][1])),
-                (float(keypoints['nose'][0]), float(keypoints['nose'][1])),
-                (float(keypoints['mouth_left'][0]), float(keypoints['mouth_left'][1])),
-                (float(keypoints['mouth_right'][0]), float(keypoints['mouth_right'][1]))
-            ]
+            points = np.asarray([keypoints[name] for name in LANDMARK_KEYS], dtype=np.float64) / scale
+            landmarks = [tuple(point) for point in points.tolist()]
         
         return FaceDetection(
             bbox=bbox,
@@ -108,12 +230,26 @@ class MTCNNFaceDetector(FaceDetectorInterface):
             landmarks=landmarks
         )
     
+    def _onet_threshold(self) -> float:
+        """
+        ONet threshold that prunes boxes our own threshold would drop anyway
+        
+        ONet's score is the reported confidence, and higher-scored boxes are kept
+        by its NMS, so filtering inside MTCNN returns exactly the same faces while
+        skipping landmark and NMS work for the discarded ones.
+        """
+        return max(MTCNN_ONET_THRESHOLD, self._confidence_threshold)
+    
     def set_confidence_threshold(self, threshold: float) -> None:
         """Set confidence threshold for detection"""
         if not 0.0 <= threshold <= 1.0:
             raise ValueError("Confidence threshold must be between 0.0 and 1.0")
         self._confidence_threshold = threshold
     
+    def get_confidence_threshold(self) -> float:
+        """Get the current confidence threshold"""
+        return self._confidence_threshold
+    
     def is_model_loaded(self) -> bool:
         """Check if model is loaded"""
         return self._model_loaded
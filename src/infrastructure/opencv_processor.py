@@ -1,11 +1,28 @@
 import cv2
 import numpy as np
+from functools import lru_cache
 from typing import Tuple
 from ..domain.interfaces import ImageProcessorInterface
 from ..domain.entities import DetectionResult
 from ..domain.exceptions import InvalidImageError, ProcessingError, FileError
 
 
+# Box colors by confidence band: red (<= 0.6), yellow (<= 0.8), green (> 0.8)
+_CONFIDENCE_BINS = np.array([0.6, 0.8])
+_COLOR_LUT = ((0, 0, 255), (0, 255, 255), (0, 255, 0))
+
+# Font settings for detection labels
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 0.6
+LABEL_THICKNESS = 2
+
+
+@lru_cache(maxsize=1024)
+def _label_size(label: str) -> Tuple[int, int]:
+    """Rendered (width, height) of a label; labels repeat heavily across faces and frames"""
+    return cv2.getTextSize(label, LABEL_FONT, LABEL_FONT_SCALE, LABEL_THICKNESS)[0]
+
+
 class OpenCVImageProcessor(ImageProcessorInterface):
     """OpenCV implementation of image processing"""
     
@@ -21,6 +38,21 @@ class OpenCVImageProcessor(ImageProcessorInterface):
                 raise
             raise FileError(f"Error loading image {image_path}: {str(e)}")
     
+    def decode_image(self, image_bytes: bytes) -> np.ndarray:
+        """Decode image bytes using OpenCV without touching the filesystem"""
+        try:
+            # imdecode asserts on an empty buffer; report it as an invalid image instead
+            if len(image_bytes) == 0:
+                raise InvalidImageError("Image data is empty")
+            image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise InvalidImageError("Could not decode image data")
+            return image
+        except Exception as e:
+            if isinstance(e, InvalidImageError):
+                raise
+            raise ProcessingError(f"Error decoding image: {str(e)}")
+    
     def save_image(self, image: np.ndarray, output_path: str) -> None:
         """Save image using OpenCV"""
         try:
@@ -32,24 +64,50 @@ class OpenCVImageProcessor(ImageProcessorInterface):
                 raise
             raise FileError(f"Error saving image to {output_path}: {str(e)}")
     
-    def draw_detections(self, image: np.ndarray, detection_result: DetectionResult) -> np.ndarray:
-        """Draw bounding boxes, landmarks, emotions, and age on image"""
+    def encode_image(self, image: np.ndarray, extension: str = '.jpg') -> bytes:
+        """Encode image using OpenCV without touching the filesystem"""
         try:
-            # Create a copy to avoid modifying the original
-            annotated_image = image.copy()
+            success, buffer = cv2.imencode(extension, image)
+            if not success:
+                raise ProcessingError(f"Failed to encode image as {extension}")
+            return buffer.tobytes()
+        except Exception as e:
+            if isinstance(e, ProcessingError):
+                raise
+            raise ProcessingError(f"Error encoding image as {extension}: {str(e)}")
+    
+    def draw_detections(
+        self,
+        image: np.ndarray,
+        detection_result: DetectionResult,
+        in_place: bool = False
+    ) -> np.ndarray:
+        """
+        Draw bounding boxes, landmarks, emotions, and age on image
+        
+        Args:
+            image: BGR image to annotate
+            detection_result: Detections to draw
+            in_place: Draw directly on image; callers that own the buffer can skip the copy
+            
+        Returns:
+            The annotated image
+        """
+        try:
+            # Copy unless the caller allows modifying the original
+            annotated_image = image if in_place else image.copy()
+            
+            # Choose colors for all faces at once based on confidence
+            faces = detection_result.faces
+            scores = np.fromiter((face.confidence for face in faces), dtype=np.float64, count=len(faces))
+            color_indices = np.digitize(scores, _CONFIDENCE_BINS, right=True).tolist()
             
-            for face in detection_result.faces:
+            for face, color_index in zip(faces, color_indices):
                 # Draw bounding box
                 x1, y1, x2, y2 = map(int, face.bbox)
                 
-                # Choose color based on confidence
                 confidence = face.confidence
-                if confidence > 0.8:
-                    color = (0, 255, 0)  # Green for high confidence
-                elif confidence > 0.6:
-                    color = (0, 255, 255)  # Yellow for medium confidence
-                else:
-                    color = (0, 0, 255)  # Red for low confidence
+                color = _COLOR_LUT[color_index]
                 
                 # Draw bounding box
                 cv2.rectangle(annotated_image, (x1, y1), (x2, y2), color, 2)
@@ -70,7 +128,7 @@ class OpenCVImageProcessor(ImageProcessorInterface):
                 # Draw labels above the bounding box
                 y_offset = y1
                 for i, label in enumerate(labels):
-                    text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+                    text_size = _label_size(label)
                     label_y = y_offset - (len(labels) - i) * (text_size[1] + 10)
                     
                     # Draw background rectangle for text
@@ -87,10 +145,10 @@ class OpenCVImageProcessor(ImageProcessorInterface):
                         annotated_image, 
                         label, 
                         (x1 + 5, label_y), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.6, 
+                        LABEL_FONT, 
+                        LABEL_FONT_SCALE, 
                         (255, 255, 255), 
-                        2
+                        LABEL_THICKNESS
                     )
                 
                 # Draw landmarks if available
@@ -108,11 +166,27 @@ class OpenCVImageProcessor(ImageProcessorInterface):
         """Resize image to target dimensions"""
         try:
             width, height = target_size
-            resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+            src_height, src_width = image.shape[:2]
+            
+            # INTER_AREA for downscaling; bilinear is cheaper and smoother when upscaling
+            interpolation = cv2.INTER_AREA if width * height < src_width * src_height else cv2.INTER_LINEAR
+            resized = cv2.resize(image, (width, height), interpolation=interpolation)
             return resized
         except Exception as e:
             raise ProcessingError(f"Error resizing image: {str(e)}")
     
+    def preprocess_face(self, face_image: np.ndarray, size: int = 224) -> np.ndarray:
+        """Resize a face crop once to a canonical square input for the analyzers"""
+        try:
+            h, w = face_image.shape[:2]
+            if h == size and w == size:
+                return np.ascontiguousarray(face_image, dtype=np.uint8)
+            interpolation = cv2.INTER_AREA if h * w > size * size else cv2.INTER_LINEAR
+            resized = cv2.resize(face_image, (size, size), interpolation=interpolation)
+            return resized.astype(np.uint8, copy=False)
+        except Exception as e:
+            raise ProcessingError(f"Error preprocessing face: {str(e)}")
+    
     def get_image_info(self, image: np.ndarray) -> dict:
         """Get image information"""
         try:
@@ -1,27 +1,31 @@
 import time
 from typing import Union, List, Tuple
 import numpy as np
+import cv2
 from retinaface import RetinaFace
 from ..domain.interfaces import FaceDetectorInterface
 from ..domain.entities import DetectionResult, FaceDetection
 from ..domain.exceptions import ModelNotLoadedError, ProcessingError, InvalidImageError
 
 
+# Landmark order stored in FaceDetection.landmarks
+LANDMARK_KEYS = ('left_eye', 'right_eye', 'nose', 'mouth_left', 'mouth_right')
+
+
 class RetinaFaceDetector(FaceDetectorInterface):
     """RetinaFace implementation of face detection"""
     
     def __init__(self, confidence_threshold: float = 0.5):
         self._confidence_threshold = confidence_threshold
         self._model_loaded = False
+        self._model = None
         self._initialize_model()
     
     def _initialize_model(self) -> None:
         """Initialize the RetinaFace model"""
         try:
-            # RetinaFace loads the model automatically on first use
-            # We'll verify it's working with a dummy detection
-            dummy_image = np.zeros((100, 100, 3), dtype=np.uint8)
-            RetinaFace.detect_faces(dummy_image)
+            # Load the weights once, without running a dummy inference
+            self._model = RetinaFace.build_model()
             self._model_loaded = True
         except Exception as e:
             raise ModelNotLoadedError(f"Failed to initialize RetinaFace model: {str(e)}")
@@ -34,31 +38,38 @@ class RetinaFaceDetector(FaceDetectorInterface):
         start_time = time.time()
         
         try:
-            # Handle string path
+            # Handle string path; decode once and hand RetinaFace the BGR array it would load itself
             if isinstance(image, str):
                 image_path = image
-            else:
-                image_path = "numpy_array"
-            
-            # Detect faces
-            detections = RetinaFace.detect_faces(image, threshold=self._confidence_threshold)
-            
-            # Get image dimensions
-            if isinstance(image, str):
-                import cv2
                 img_array = cv2.imread(image)
                 if img_array is None:
                     raise InvalidImageError(f"Could not load image: {image}")
-                image_size = (img_array.shape[1], img_array.shape[0])  # (width, height)
             else:
-                image_size = (image.shape[1], image.shape[0])
+                image_path = "numpy_array"
+                img_array = image
+            
+            image_size = (img_array.shape[1], img_array.shape[0])  # (width, height)
+            
+            # Detect faces
+            detections = RetinaFace.detect_faces(
+                img_array, threshold=self._confidence_threshold, model=self._model
+            )
             
             # Convert detections to domain entities
             faces = []
-            if isinstance(detections, dict):
-                for face_key, face_data in detections.items():
-                    face = self._convert_detection(face_data)
-                    faces.append(face)
+            if isinstance(detections, dict) and detections:
+                detection_list = list(detections.values())
+                
+                # Convert all [x, y, w, h] areas to [x1, y1, x2, y2] boxes at once
+                boxes = np.asarray(
+                    [face_data['facial_area'] for face_data in detection_list], dtype=np.float64
+                ).reshape(-1, 4)
+                boxes[:, 2:] += boxes[:, :2]
+                
+                faces = [
+                    self._convert_detection(face_data, tuple(bbox))
+                    for face_data, bbox in zip(detection_list, boxes.tolist())
+                ]
             
             processing_time = time.time() - start_time
             
@@ -74,32 +85,17 @@ class RetinaFaceDetector(FaceDetectorInterface):
                 raise
             raise ProcessingError(f"Error during face detection: {str(e)}")
     
-    def _convert_detection(self, face_data: dict) -> FaceDetection:
-        """Convert RetinaFace detection to domain entity"""
+    def _convert_detection(self, face_data: dict, bbox: Tuple[float, float, float, float]) -> FaceDetection:
+        """Convert RetinaFace detection with its precomputed (x1, y1, x2, y2) box to domain entity"""
         # RetinaFace returns: {'facial_area': [x, y, w, h], 'score': confidence, 'landmarks': {...}}
-        facial_area = face_data['facial_area']
-        
-        # Convert [x, y, w, h] to [x1, y1, x2, y2]
-        bbox = (
-            float(facial_area[0]),  # x1
-            float(facial_area[1]),  # y1
-            float(facial_area[0] + facial_area[2]),  # x2
-            float(facial_area[1] + facial_area[3])   # y2
-        )
-        
         confidence = float(face_data['score'])
         
-        # Extract landmarks if available
+        # Extract landmarks if available, in a fixed key order with one vector cast
         landmarks = None
         if 'landmarks' in face_data:
             landmarks_dict = face_data['landmarks']
-            landmarks = [
-                (float(landmarks_dict['left_eye'][0]), float(landmarks_dict['left_eye'][1])),
-                (float(landmarks_dict['right_eye'][0]), float(landmarks_dict['right_eye'][1])),
-                (float(landmarks_dict['nose'][0]), float(landmarks_dict['nose'][1])),
-                (float(landmarks_dict['mouth_left'][0]), float(landmarks_dict['mouth_left'][1])),
-                (float(landmarks_dict['mouth_right'][0]), float(landmarks_dict['mouth_right'][1]))
-            ]
+            points = np.asarray([landmarks_dict[name] for name in LANDMARK_KEYS], dtype=np.float64)
+            landmarks = [tuple(point) for point in points.tolist()]
         
         return FaceDetection(
             bbox=bbox,
@@ -113,6 +109,10 @@ class RetinaFaceDetector(FaceDetectorInterface):
             raise ValueError("Confidence threshold must be between 0.0 and 1.0")
         self._confidence_threshold = threshold
     
+    def get_confidence_threshold(self) -> float:
+        """Get the current confidence threshold"""
+        return self._confidence_threshold
+    
     def is_model_loaded(self) -> bool:
         """Check if model is loaded"""
         return self._model_loaded
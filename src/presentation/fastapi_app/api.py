@@ -2,11 +2,16 @@
 FastAPI implementation demonstrating framework independence
 """
 
+import asyncio
+import mimetypes
 import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi.responses import Response
+from typing import Optional, Tuple
+import numpy as np
 import uvicorn
 
 from ...application.use_cases import FaceDetectionUseCase
@@ -14,23 +19,52 @@ from ...application.services import DetectionResultSerializer, ValidationService
 from ...infrastructure.mtcnn_detector import MTCNNFaceDetector
 from ...infrastructure.opencv_processor import OpenCVImageProcessor
 from ...domain.exceptions import DetectionError
+from .batcher import DetectionBatcher
+
+
+# Process-wide detection stack shared by every FaceDetectionFastAPI instance, so the
+# MTCNN weights are loaded once per process. Deploy with a single Uvicorn worker and
+# let the request batcher provide throughput instead of duplicating the model per worker.
+_SHARED_USE_CASE: Optional[FaceDetectionUseCase] = None
+_SHARED_INFERENCE_POOL: Optional[ThreadPoolExecutor] = None
+_SHARED_INFERENCE_WORKERS: Optional[int] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def _get_shared_dependencies(inference_workers: int) -> Tuple[FaceDetectionUseCase, ThreadPoolExecutor]:
+    """Create the detection use case and its inference pool on first use, then reuse them"""
+    global _SHARED_USE_CASE, _SHARED_INFERENCE_POOL, _SHARED_INFERENCE_WORKERS
+    with _SHARED_LOCK:
+        if _SHARED_USE_CASE is None:
+            # Downscale large uploads for latency; very small faces in them may be missed
+            _SHARED_USE_CASE = FaceDetectionUseCase(
+                MTCNNFaceDetector(max_input_side=1280), OpenCVImageProcessor()
+            )
+            
+            # The use case keeps per-detector state (e.g. the confidence threshold), so more
+            # than one worker is only safe with thread-safe detectors
+            _SHARED_INFERENCE_POOL = ThreadPoolExecutor(
+                max_workers=inference_workers, thread_name_prefix="face-inference"
+            )
+            _SHARED_INFERENCE_WORKERS = inference_workers
+        elif inference_workers != _SHARED_INFERENCE_WORKERS:
+            print(
+                f"Warning: inference_workers={inference_workers} ignored; the shared inference "
+                f"pool was already created with {_SHARED_INFERENCE_WORKERS} worker(s)"
+            )
+        return _SHARED_USE_CASE, _SHARED_INFERENCE_POOL
 
 
 class FaceDetectionFastAPI:
     """FastAPI implementation of face detection service"""
     
-    def __init__(self, upload_folder: str = "uploads", results_folder: str = "results"):
+    def __init__(self, inference_workers: int = 1):
         self.app = FastAPI(
             title="Face Detection API",
             description="Face detection service using RetinaFace",
             version="1.0.0"
         )
-        self.upload_folder = upload_folder
-        self.results_folder = results_folder
-        
-        # Ensure directories exist
-        os.makedirs(upload_folder, exist_ok=True)
-        os.makedirs(results_folder, exist_ok=True)
+        self._inference_workers = inference_workers
         
         # Initialize dependencies
         self._setup_dependencies()
@@ -40,13 +74,38 @@ class FaceDetectionFastAPI:
     
     def _setup_dependencies(self):
         """Setup dependency injection"""
-        face_detector = MTCNNFaceDetector()
-        image_processor = OpenCVImageProcessor()
-        self.face_detection_use_case = FaceDetectionUseCase(face_detector, image_processor)
+        # Persistent pool for model inference, so the event loop keeps accepting uploads
+        self.face_detection_use_case, self._inference_pool = _get_shared_dependencies(
+            self._inference_workers
+        )
+        self.image_processor = OpenCVImageProcessor()
+        
+        # Coalesce concurrent /detect requests into batched detector calls
+        self.detection_batcher = DetectionBatcher(
+            self.face_detection_use_case.detect_faces_in_arrays, executor=self._inference_pool
+        )
+    
+    def _decode_upload(self, upload: UploadFile) -> np.ndarray:
+        """Decode an upload straight from its spooled file, without an intermediate bytes copy"""
+        upload.file.seek(0, os.SEEK_END)
+        size = upload.file.tell()
+        upload.file.seek(0)
+        
+        # Read the encoded image directly into a NumPy buffer for the decoder
+        buffer = np.empty(size, dtype=np.uint8)
+        bytes_read = upload.file.readinto(buffer) or 0
+        
+        # Only hand the decoder what was actually read, never the uninitialized tail
+        return self.image_processor.decode_image(buffer[:bytes_read])
     
     def _register_routes(self):
         """Register FastAPI routes"""
         
+        @self.app.on_event("shutdown")
+        async def shutdown():
+            """Stop the detection batcher"""
+            await self.detection_batcher.close()
+        
         @self.app.get("/health")
         async def health_check():
             """Health check endpoint"""
@@ -74,21 +133,15 @@ class FaceDetectionFastAPI:
                             detail="Confidence threshold must be between 0.0 and 1.0"
                         )
                 
-                # Save uploaded file
                 file_id = str(uuid.uuid4())
-                file_path = os.path.join(self.upload_folder, f"{file_id}_{image.filename}")
-                
-                content = await image.read()
-                with open(file_path, "wb") as f:
-                    f.write(content)
                 
-                # Perform detection
-                result = self.face_detection_use_case.detect_faces_in_image(
-                    file_path, confidence
+                # Decode the upload in memory, off the event loop
+                img_array = await asyncio.get_running_loop().run_in_executor(
+                    None, self._decode_upload, image
                 )
                 
-                # Clean up
-                os.remove(file_path)
+                # Perform detection, batched with other concurrent requests
+                result = await self.detection_batcher.detect(img_array, confidence)
                 
                 # Return result
                 response_data = DetectionResultSerializer.to_dict(result)
@@ -123,29 +176,23 @@ class FaceDetectionFastAPI:
                             detail="Confidence threshold must be between 0.0 and 1.0"
                         )
                 
-                # Save uploaded file
-                file_id = str(uuid.uuid4())
-                input_path = os.path.join(self.upload_folder, f"{file_id}_{image.filename}")
-                output_path = os.path.join(self.results_folder, f"{file_id}_annotated_{image.filename}")
-                
-                content = await image.read()
-                with open(input_path, "wb") as f:
-                    f.write(content)
-                
-                # Perform detection and annotation
-                self.face_detection_use_case.detect_and_annotate(
-                    input_path, output_path, confidence
+                # Decode the upload in memory instead of saving it
+                img_array = await asyncio.get_running_loop().run_in_executor(
+                    None, self._decode_upload, image
                 )
                 
-                # Clean up input file
-                os.remove(input_path)
+                # Perform detection and annotation, encoding in the upload's format in memory
+                extension = os.path.splitext(image.filename)[1].lower()
+                _, annotated_bytes = await asyncio.get_running_loop().run_in_executor(
+                    self._inference_pool,
+                    self.face_detection_use_case.annotate_image_to_bytes,
+                    img_array, extension, confidence
+                )
                 
-                # Return annotated image
-                return FileResponse(
-                    output_path,
-                    media_type="image/jpeg",
-                    filename=f"annotated_{image.filename}",
-                    background=lambda: os.remove(output_path) if os.path.exists(output_path) else None
+                return Response(
+                    content=annotated_bytes,
+                    media_type=mimetypes.guess_type(image.filename)[0] or "image/jpeg",
+                    headers={"Content-Disposition": f'attachment; filename="annotated_{image.filename}"'}
                 )
                 
             except DetectionError as e:
@@ -160,18 +207,12 @@ class FaceDetectionFastAPI:
 
 def create_app():
     """Application factory for FastAPI"""
-    upload_folder = os.path.join(os.path.dirname(__file__), '../../../uploads')
-    results_folder = os.path.join(os.path.dirname(__file__), '../../../results')
-    
-    api = FaceDetectionFastAPI(upload_folder, results_folder)
+    api = FaceDetectionFastAPI()
     return api.app
 
 
 if __name__ == "__main__":
-    upload_folder = os.path.join(os.path.dirname(__file__), '../../../uploads')
-    results_folder = os.path.join(os.path.dirname(__file__), '../../../results')
-    
-    api = FaceDetectionFastAPI(upload_folder, results_folder)
+    api = FaceDetectionFastAPI()
     
     print("Starting Face Detection API (FastAPI)...")
     print("Available endpoints:")
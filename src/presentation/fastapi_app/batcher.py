@@ -0,0 +1,109 @@
+"""
+Request coalescing for batched face detection in the FastAPI app
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+from ...domain.entities import DetectionResult
+
+
+class DetectionBatcher:
+    """Collects concurrent detection requests and runs them as one detector batch"""
+    
+    def __init__(
+        self,
+        detect_batch: Callable[[List[np.ndarray], Optional[float]], List[DetectionResult]],
+        max_batch: int = 8,
+        max_wait_ms: float = 10.0,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        """
+        Initialize the batcher
+        
+        Args:
+            detect_batch: Callable taking (images, confidence_threshold) and returning
+                one DetectionResult per image, e.g. FaceDetectionUseCase.detect_faces_in_arrays
+            max_batch: Maximum number of images per detector call
+            max_wait_ms: How long to wait for more requests after the first one arrives
+            executor: Executor for detector calls; a private single-thread one is created if omitted
+        """
+        self._detect_batch = detect_batch
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        
+        # Detector calls run off the event loop
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="detection-batcher")
+    
+    async def detect(self, image: np.ndarray, confidence_threshold: Optional[float] = None) -> DetectionResult:
+        """Queue one decoded image and wait for its detection result"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, confidence_threshold, future))
+        return await future
+    
+    async def close(self) -> None:
+        """Stop the background worker and release the executor if it owns it"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+    
+    async def _run(self) -> None:
+        """Drain the queue in batches of up to max_batch items or max_wait seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            
+            while len(items) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # The detector holds a single threshold, so batch requests that share one
+            groups = {}
+            for item in items:
+                groups.setdefault(item[1], []).append(item)
+            
+            for confidence_threshold, group in groups.items():
+                await self._run_group(loop, confidence_threshold, group)
+    
+    async def _run_group(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        confidence_threshold: Optional[float],
+        group: List[Tuple[np.ndarray, Optional[float], asyncio.Future]]
+    ) -> None:
+        """Run one detector batch and resolve each caller's future"""
+        images = [image for image, _, _ in group]
+        try:
+            results = await loop.run_in_executor(
+                self._executor, self._detect_batch, images, confidence_threshold
+            )
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
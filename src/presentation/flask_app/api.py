@@ -1,52 +1,98 @@
 import os
+import io
 import uuid
-from flask import Flask, request, jsonify, send_file
+import hashlib
+import mimetypes
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import orjson
+from flask import Flask, Request, Response, g, request, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 from ...application.use_cases import FaceDetectionUseCase
 from ...application.services import DetectionResultSerializer, ValidationService
-from ...infrastructure.mtcnn_detector import MTCNNFaceDetector
+from ...infrastructure.mtcnn_detector import MTCNNFaceDetector, release_mtcnn
 from ...infrastructure.deepface_emotion_detector import DeepFaceEmotionDetector
 from ...infrastructure.deepface_age_detector import DeepFaceAgeDetector
 from ...infrastructure.deepface_combined_detector import DeepFaceCombinedDetector
 from ...infrastructure.opencv_processor import OpenCVImageProcessor
+from ...infrastructure._model_cache import release_models
+from ...domain.entities import DetectionResult
 from ...domain.exceptions import DetectionError, InvalidImageError, FileError
+from .batcher import ThreadedDetectionBatcher
+
+
+# Maximum number of images accepted by one /detect-batch request
+MAX_BATCH_IMAGES = 16
+
+# Uploads up to this size are spooled in memory; larger ones spill to a temporary file
+UPLOAD_SPOOL_SIZE = 4 * 1024 * 1024
+
+
+def _json_response(data: dict, status: int = 200) -> Response:
+    """Serialize a JSON response body with orjson instead of jsonify's stdlib encoder"""
+    return Response(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY), status=status, mimetype='application/json')
+
+
+class _SpooledUploadRequest(Request):
+    """Request that buffers uploaded files in a SpooledTemporaryFile"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
 
 
 class FaceDetectionAPI:
     """Flask API for face detection"""
     
-    def __init__(self, upload_folder: str = "uploads", results_folder: str = "results"):
+    def __init__(self, annotation_cache_size: int = 128):
         self.app = Flask(__name__)
+        self.app.request_class = _SpooledUploadRequest
         # Enable CORS for all routes and origins
         self.cors = CORS(self.app, resources={r"/*": {"origins": "*"}})
         self.app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-        self.upload_folder = upload_folder
-        self.results_folder = results_folder
         
-        # Ensure directories exist
-        os.makedirs(upload_folder, exist_ok=True)
-        os.makedirs(results_folder, exist_ok=True)
+        # LRU cache of annotated images keyed by upload content hash and options
+        self._annotation_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._annotation_cache_size = annotation_cache_size
+        self._annotation_cache_lock = threading.Lock()
+        
+        # Unload the models after this many idle seconds and reload them on the next
+        # detection request (0 keeps them loaded for the life of the process)
+        self._idle_unload_s = float(os.getenv('IDLE_UNLOAD_S', '0'))
+        self._models_lock = threading.Lock()
+        self._active_requests = 0
+        self._last_used = time.monotonic()
         
         # Initialize dependencies
         self._setup_dependencies()
         
+        # Coalesce concurrent detection-only requests into one batched MTCNN call
+        self.detection_batcher = ThreadedDetectionBatcher(self._detect_faces_in_arrays)
+        
         # Register routes
         self._register_routes()
+        
+        if self._idle_unload_s > 0:
+            threading.Thread(target=self._unload_when_idle, name="model-idle-unloader", daemon=True).start()
     
     def _setup_dependencies(self):
         """Setup dependency injection"""
         try:
-            face_detector = MTCNNFaceDetector()
+            # Downscale large uploads for latency; very small faces in them may be missed
+            face_detector = MTCNNFaceDetector(max_input_side=1280)
             image_processor = OpenCVImageProcessor()
             
             # Use combined detector for efficiency (handles both emotion and age)
             combined_detector = DeepFaceCombinedDetector()
             
-            # Also keep individual detectors for flexibility
+            # Individual detectors serve as per-task fallbacks; they take the same
+            # process-wide models as the combined detector, so no extra weights are loaded
             emotion_detector = DeepFaceEmotionDetector()
             age_detector = DeepFaceAgeDetector()
             
@@ -57,17 +103,106 @@ class FaceDetectionAPI:
                 age_detector,
                 combined_detector
             )
+            self.image_processor = image_processor
+            
+            self._warm_up(face_detector)
         except Exception as e:
             print(f"Error initializing dependencies: {str(e)}")
             raise
     
+    def _warm_up(self, face_detector: MTCNNFaceDetector) -> None:
+        """Run one dummy MTCNN pass so the first request sees steady-state latency"""
+        # The DeepFace models (and the combined detector's traced graph) are
+        # already warmed up when they are loaded
+        try:
+            face_detector.warm_up()
+            print("Face detection models warmed up")
+        except Exception as e:
+            print(f"Warning: model warm-up failed: {str(e)}")
+    
+    def _detect_faces_in_arrays(
+        self,
+        images: List[np.ndarray],
+        confidence_threshold: Optional[float]
+    ) -> List[DetectionResult]:
+        """Batch entry point that always uses the currently loaded use case"""
+        return self.face_detection_use_case.detect_faces_in_arrays(images, confidence_threshold)
+    
+    def _acquire_models(self) -> None:
+        """Mark a detection request as active, reloading the models if they were unloaded"""
+        with self._models_lock:
+            if self.face_detection_use_case is None:
+                print("Reloading face detection models after idle unload")
+                self._setup_dependencies()
+            self._active_requests += 1
+            self._last_used = time.monotonic()
+    
+    def _release_models(self) -> None:
+        """Mark a detection request as finished"""
+        with self._models_lock:
+            self._active_requests -= 1
+            self._last_used = time.monotonic()
+    
+    def _unload_when_idle(self) -> None:
+        """Background loop that frees the models after IDLE_UNLOAD_S seconds without requests"""
+        while True:
+            time.sleep(min(self._idle_unload_s, 30.0))
+            with self._models_lock:
+                idle_s = time.monotonic() - self._last_used
+                if (self.face_detection_use_case is None or self._active_requests
+                        or idle_s < self._idle_unload_s):
+                    continue
+                
+                self.face_detection_use_case = None
+                release_mtcnn()
+                release_models()
+                print(f"Unloaded face detection models after {idle_s:.0f}s idle")
+    
+    def _get_cached_annotation(self, cache_key: tuple) -> Optional[bytes]:
+        """Return a cached annotated image and mark it as most recently used"""
+        with self._annotation_cache_lock:
+            annotated_bytes = self._annotation_cache.get(cache_key)
+            if annotated_bytes is not None:
+                self._annotation_cache.move_to_end(cache_key)
+            return annotated_bytes
+    
+    def _store_cached_annotation(self, cache_key: tuple, annotated_bytes: bytes) -> None:
+        """Store an annotated image, evicting the least recently used entries"""
+        if self._annotation_cache_size <= 0:
+            return
+        with self._annotation_cache_lock:
+            self._annotation_cache[cache_key] = annotated_bytes
+            self._annotation_cache.move_to_end(cache_key)
+            while len(self._annotation_cache) > self._annotation_cache_size:
+                self._annotation_cache.popitem(last=False)
+    
     def _register_routes(self):
         """Register Flask routes"""
         
+        @self.app.before_request
+        def reject_oversized_upload():
+            """Reject uploads over the size limit from the Content-Length header, before parsing the body"""
+            max_length = self.app.config['MAX_CONTENT_LENGTH']
+            if request.content_length is not None and request.content_length > max_length:
+                return _json_response({"error": "File too large. Maximum size is 16MB"}, 413)
+        
+        if self._idle_unload_s > 0:
+            @self.app.before_request
+            def acquire_models():
+                """Keep the models loaded while a detection request is in flight"""
+                if request.method == 'POST':
+                    self._acquire_models()
+                    g.holds_models = True
+            
+            @self.app.teardown_request
+            def release_models_after_request(exc):
+                if g.pop('holds_models', False):
+                    self._release_models()
+        
         @self.app.route('/health', methods=['GET'])
         def health_check():
             """Health check endpoint"""
-            return jsonify({
+            return _json_response({
                 "status": "healthy",
                 "service": "face-detection-api"
             })
@@ -78,11 +213,11 @@ class FaceDetectionAPI:
             try:
                 # Validate request
                 if 'image' not in request.files:
-                    return jsonify({"error": "No image file provided"}), 400
+                    return _json_response({"error": "No image file provided"}, 400)
                 
                 file = request.files['image']
                 if file.filename == '':
-                    return jsonify({"error": "No file selected"}), 400
+                    return _json_response({"error": "No file selected"}, 400)
                 
                 # Get optional parameters
                 confidence_threshold = request.form.get('confidence', type=float)
@@ -91,39 +226,79 @@ class FaceDetectionAPI:
                 
                 if confidence_threshold is not None:
                     if not ValidationService.validate_confidence_threshold(confidence_threshold):
-                        return jsonify({"error": "Confidence threshold must be between 0.0 and 1.0"}), 400
+                        return _json_response({"error": "Confidence threshold must be between 0.0 and 1.0"}, 400)
                 
-                # Save uploaded file
-                filename = secure_filename(file.filename)
-                if not ValidationService.validate_image_file(filename):
-                    return jsonify({"error": "Unsupported image format"}), 400
+                # Check the extension first so rejected uploads skip the remaining work
+                if not ValidationService.validate_image_file(file.filename):
+                    return _json_response({"error": "Unsupported image format"}, 400)
                 
                 file_id = str(uuid.uuid4())
-                file_path = os.path.join(self.upload_folder, f"{file_id}_{filename}")
-                file.save(file_path)
                 
-                # Perform detection
-                result = self.face_detection_use_case.detect_faces_in_image(
-                    file_path, confidence_threshold, detect_emotions, detect_age
-                )
+                # Perform detection on the upload in memory, without saving it to disk
+                image_bytes = file.stream.read()
+                if detect_emotions or detect_age:
+                    result = self.face_detection_use_case.detect_faces_in_bytes(
+                        image_bytes, confidence_threshold, detect_emotions, detect_age
+                    )
+                else:
+                    # Detection-only requests are batched with other concurrent requests
+                    img_array = self.image_processor.decode_image(image_bytes)
+                    result = self.detection_batcher.detect(img_array, confidence_threshold)
                 
                 # Serialize result
-                response_data = DetectionResultSerializer.to_dict(result)
-                response_data["file_id"] = file_id
+                return Response(
+                    DetectionResultSerializer.to_json_bytes(result, file_id=file_id),
+                    mimetype='application/json'
+                )
                 
-                return jsonify(response_data)
+            except DetectionError as e:
+                return _json_response({"error": str(e)}, 400)
+            except Exception as e:
+                return _json_response({"error": f"Internal server error: {str(e)}"}, 500)
+        
+        @self.app.route('/detect-batch', methods=['POST'])
+        def detect_faces_batch():
+            """Detect faces in several uploaded images with batched model calls"""
+            try:
+                # Validate request
+                files = [file for file in request.files.getlist('images') if file.filename != '']
+                if not files:
+                    return _json_response({"error": "No image files provided"}, 400)
+                if len(files) > MAX_BATCH_IMAGES:
+                    return _json_response({"error": f"At most {MAX_BATCH_IMAGES} images per request"}, 400)
+                
+                # Get optional parameters
+                confidence_threshold = request.form.get('confidence', type=float)
+                detect_emotions = request.form.get('emotions', 'false').lower() == 'true'
+                detect_age = request.form.get('age', 'false').lower() == 'true'
+                
+                if confidence_threshold is not None:
+                    if not ValidationService.validate_confidence_threshold(confidence_threshold):
+                        return _json_response({"error": "Confidence threshold must be between 0.0 and 1.0"}, 400)
+                
+                for file in files:
+                    if not ValidationService.validate_image_file(file.filename):
+                        return _json_response({"error": f"Unsupported image format: {file.filename}"}, 400)
+                
+                # Decode every upload in memory, then detect and analyze them together
+                images = [self.image_processor.decode_image(file.stream.read()) for file in files]
+                results = self.face_detection_use_case.detect_faces_in_arrays(
+                    images, confidence_threshold, detect_emotions, detect_age
+                )
+                
+                # Serialize results, keyed by upload index
+                return _json_response({
+                    "count": len(results),
+                    "results": [
+                        {"index": index, **DetectionResultSerializer.to_dict(result)}
+                        for index, result in enumerate(results)
+                    ]
+                })
                 
             except DetectionError as e:
-                return jsonify({"error": str(e)}), 400
+                return _json_response({"error": str(e)}, 400)
             except Exception as e:
-                return jsonify({"error": f"Internal server error: {str(e)}"}), 500
-            finally:
-                # Clean up uploaded file
-                if 'file_path' in locals() and os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except:
-                        pass
+                return _json_response({"error": f"Internal server error: {str(e)}"}, 500)
         
         @self.app.route('/detect-and-annotate', methods=['POST'])
         def detect_and_annotate():
@@ -131,11 +306,11 @@ class FaceDetectionAPI:
             try:
                 # Validate request
                 if 'image' not in request.files:
-                    return jsonify({"error": "No image file provided"}), 400
+                    return _json_response({"error": "No image file provided"}, 400)
                 
                 file = request.files['image']
                 if file.filename == '':
-                    return jsonify({"error": "No file selected"}), 400
+                    return _json_response({"error": "No file selected"}, 400)
                 
                 # Get optional parameters
                 confidence_threshold = request.form.get('confidence', type=float)
@@ -144,56 +319,62 @@ class FaceDetectionAPI:
                 
                 if confidence_threshold is not None:
                     if not ValidationService.validate_confidence_threshold(confidence_threshold):
-                        return jsonify({"error": "Confidence threshold must be between 0.0 and 1.0"}), 400
+                        return _json_response({"error": "Confidence threshold must be between 0.0 and 1.0"}, 400)
                 
-                # Save uploaded file
-                filename = secure_filename(file.filename)
-                if not ValidationService.validate_image_file(filename):
-                    return jsonify({"error": "Unsupported image format"}), 400
-                
-                file_id = str(uuid.uuid4())
-                input_path = os.path.join(self.upload_folder, f"{file_id}_{filename}")
-                output_path = os.path.join(self.results_folder, f"{file_id}_annotated_{filename}")
+                # Check the extension first so rejected uploads skip the remaining work
+                if not ValidationService.validate_image_file(file.filename):
+                    return _json_response({"error": "Unsupported image format"}, 400)
                 
-                file.save(input_path)
+                # The sanitized name is only needed for the download name
+                filename = secure_filename(file.filename)
                 
-                # Perform detection and annotation
-                result = self.face_detection_use_case.detect_and_annotate(
-                    input_path, output_path, confidence_threshold, True, detect_emotions, detect_age
+                # Annotate in memory; repeated uploads are served from the cache
+                image_bytes = file.stream.read()
+                extension = os.path.splitext(file.filename)[1].lower()
+                # Resolve None to the detector's current threshold once and pass that value on
+                # explicitly: the use case applies it atomically with detection, so the cached
+                # bytes always match the key even if another request changes the threshold
+                effective_threshold = (
+                    confidence_threshold if confidence_threshold is not None
+                    else self.face_detection_use_case.get_confidence_threshold()
+                )
+                cache_key = (
+                    hashlib.sha1(image_bytes).digest(), extension,
+                    effective_threshold, detect_emotions, detect_age
                 )
                 
+                annotated_bytes = self._get_cached_annotation(cache_key)
+                if annotated_bytes is None:
+                    img_array = self.image_processor.decode_image(image_bytes)
+                    _, annotated_bytes = self.face_detection_use_case.annotate_image_to_bytes(
+                        img_array, extension, effective_threshold, detect_emotions, detect_age
+                    )
+                    self._store_cached_annotation(cache_key, annotated_bytes)
+                
                 # Return annotated image
                 return send_file(
-                    output_path,
+                    io.BytesIO(annotated_bytes),
                     as_attachment=True,
                     download_name=f"annotated_{filename}",
-                    mimetype='image/jpeg'
+                    mimetype=mimetypes.guess_type(file.filename)[0] or 'image/jpeg'
                 )
                 
             except DetectionError as e:
-                return jsonify({"error": str(e)}), 400
+                return _json_response({"error": str(e)}, 400)
             except Exception as e:
-                return jsonify({"error": f"Internal server error: {str(e)}"}), 500
-            finally:
-                # Clean up files
-                for path in [input_path, output_path]:
-                    if 'path' in locals() and os.path.exists(path):
-                        try:
-                            os.remove(path)
-                        except:
-                            pass
+                return _json_response({"error": f"Internal server error: {str(e)}"}, 500)
         
         @self.app.errorhandler(RequestEntityTooLarge)
         def handle_file_too_large(e):
-            return jsonify({"error": "File too large. Maximum size is 16MB"}), 413
+            return _json_response({"error": "File too large. Maximum size is 16MB"}, 413)
         
         @self.app.errorhandler(404)
         def handle_not_found(e):
-            return jsonify({"error": "Endpoint not found"}), 404
+            return _json_response({"error": "Endpoint not found"}, 404)
         
         @self.app.errorhandler(500)
         def handle_internal_error(e):
-            return jsonify({"error": "Internal server error"}), 500
+            return _json_response({"error": "Internal server error"}, 500)
     
     def run(self, host: str = '0.0.0.0', port: int = 5000, debug: bool = False):
         """Run the Flask application"""
@@ -13,32 +13,30 @@ from src.presentation.flask_app.api import FaceDetectionAPI
 
 
 def create_app():
-    """Application factory"""
-    upload_folder = os.path.join(os.path.dirname(__file__), '../../../uploads')
-    results_folder = os.path.join(os.path.dirname(__file__), '../../../results')
-    
-    api = FaceDetectionAPI(upload_folder, results_folder)
+    """Application factory, also the gunicorn entry point ('src.presentation.flask_app.app:create_app()')"""
+    api = FaceDetectionAPI()
     return api.app
 
 
 def main():
     """Main entry point"""
     try:
-        upload_folder = os.path.join(os.path.dirname(__file__), '../../../uploads')
-        results_folder = os.path.join(os.path.dirname(__file__), '../../../results')
-        
-        api = FaceDetectionAPI(upload_folder, results_folder)
+        api = FaceDetectionAPI()
         
         print("Starting Face Detection API...")
         print("Available endpoints:")
         print("  GET  /health - Health check")
         print("  POST /detect - Detect faces in image (returns JSON)")
         print("    - Optional parameters: confidence (float), emotions (true/false), age (true/false)")
+        print("  POST /detect-batch - Detect faces in up to 16 images (field 'images', returns JSON)")
+        print("    - Optional parameters: confidence (float), emotions (true/false), age (true/false)")
         print("  POST /detect-and-annotate - Detect faces and return annotated image")
         print("    - Optional parameters: confidence (float), emotions (true/false), age (true/false)")
         print("\nServer starting on http://localhost:5000")
         
-        api.run(host='0.0.0.0', port=5000, debug=True)
+        # The debugger and reloader (which loads the models twice) are for development only
+        debug = os.getenv('FLASK_ENV', 'production').lower() == 'development'
+        api.run(host='0.0.0.0', port=5000, debug=debug)
         
     except Exception as e:
         print(f"Error starting application: {str(e)}")
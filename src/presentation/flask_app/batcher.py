@@ -0,0 +1,90 @@
+"""
+Request coalescing for batched face detection in the threaded Flask app
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+from ...domain.entities import DetectionResult
+
+
+class ThreadedDetectionBatcher:
+    """Collects detection requests from concurrent request threads and runs them as one detector batch"""
+    
+    def __init__(
+        self,
+        detect_batch: Callable[[List[np.ndarray], Optional[float]], List[DetectionResult]],
+        max_batch: int = 8,
+        max_wait_ms: float = 50.0
+    ):
+        """
+        Initialize the batcher
+        
+        Args:
+            detect_batch: Callable taking (images, confidence_threshold) and returning
+                one DetectionResult per image, e.g. FaceDetectionUseCase.detect_faces_in_arrays.
+                It must apply the threshold atomically with detection, since request threads
+                share the same detector.
+            max_batch: Maximum number of images per detector call
+            max_wait_ms: How long to wait for more requests after the first one arrives
+        """
+        self._detect_batch = detect_batch
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[np.ndarray, Optional[float], Future]]" = queue.Queue()
+        
+        # A single daemon thread owns every detector call
+        self._worker = threading.Thread(target=self._run, name="detection-batcher", daemon=True)
+        self._worker.start()
+    
+    def detect(self, image: np.ndarray, confidence_threshold: Optional[float] = None) -> DetectionResult:
+        """Queue one decoded image and block until its detection result is ready"""
+        future: Future = Future()
+        self._queue.put((image, confidence_threshold, future))
+        return future.result()
+    
+    def _run(self) -> None:
+        """Drain the queue in batches of up to max_batch items or max_wait seconds"""
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait
+            
+            while len(items) < self._max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            # One detector call runs at one threshold, so batch requests that share one.
+            # detect_batch applies the threshold under the use case's detector lock, which
+            # also serializes the request threads that call the detector directly.
+            groups = {}
+            for item in items:
+                groups.setdefault(item[1], []).append(item)
+            
+            for confidence_threshold, group in groups.items():
+                self._run_group(confidence_threshold, group)
+    
+    def _run_group(
+        self,
+        confidence_threshold: Optional[float],
+        group: List[Tuple[np.ndarray, Optional[float], Future]]
+    ) -> None:
+        """Run one detector batch and resolve each caller's future"""
+        images = [image for image, _, _ in group]
+        try:
+            results = self._detect_batch(images, confidence_threshold)
+        except Exception as e:
+            for _, _, future in group:
+                future.set_exception(e)
+            return
+        
+        for (_, _, future), result in zip(group, results):
+            future.set_result(result)
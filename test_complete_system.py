@@ -6,6 +6,7 @@ Complete test for Face Detection + Emotion + Age Recognition API
 import os
 import sys
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 from pathlib import Path
@@ -15,11 +16,15 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
 
 API_BASE = "http://localhost:5000"
 
+# Shared session so consecutive calls reuse the same keep-alive connection
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 def test_api_health():
     """Test API health endpoint"""
     print("🏥 Testing API health...")
     try:
-        response = requests.get(f"{API_BASE}/health")
+        response = _SESSION.get(f"{API_BASE}/health")
         if response.status_code == 200:
             data = response.json()
             print(f"✅ API is healthy: {data}")
@@ -61,7 +66,7 @@ def test_face_detection_only():
                 'age': 'false'
             }
             
-            response = requests.post(f"{API_BASE}/detect", files=files, data=data)
+            response = _SESSION.post(f"{API_BASE}/detect", files=files, data=data)
             
             if response.status_code == 200:
                 result = response.json()
@@ -107,7 +112,7 @@ def test_complete_analysis():
             }
             
             start_time = time.time()
-            response = requests.post(f"{API_BASE}/detect", files=files, data=data)
+            response = _SESSION.post(f"{API_BASE}/detect", files=files, data=data)
             end_time = time.time()
             
             if response.status_code == 200:
@@ -175,7 +180,7 @@ def test_annotated_image():
                 'age': 'true'
             }
             
-            response = requests.post(f"{API_BASE}/detect-and-annotate", files=files, data=data)
+            response = _SESSION.post(f"{API_BASE}/detect-and-annotate", files=files, data=data)
             
             if response.status_code == 200:
                 # Save the annotated image
@@ -229,7 +234,7 @@ def test_performance():
                 data = {'confidence': '0.5', **params}
                 
                 start_time = time.time()
-                response = requests.post(f"{API_BASE}/detect", files=files, data=data)
+                response = _SESSION.post(f"{API_BASE}/detect", files=files, data=data)
                 end_time = time.time()
                 
                 if response.status_code == 200:
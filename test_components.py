@@ -52,7 +52,7 @@ def test_components():
         print("\n5. Testing emotion detection with dummy face image...")
         
         # Create a simple test face image (just for testing the pipeline)
-        dummy_face = np.ones((100, 100, 3), dtype=np.uint8) * 128
+        dummy_face = np.full((100, 100, 3), 128, dtype=np.uint8)
         # Add some basic features to make it more face-like
         cv2.circle(dummy_face, (30, 40), 5, (0, 0, 0), -1)  # Left eye
         cv2.circle(dummy_face, (70, 40), 5, (0, 0, 0), -1)  # Right eye
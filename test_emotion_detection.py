@@ -6,11 +6,16 @@ Test script for emotion detection functionality
 import os
 import sys
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
 # Add src to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+# Shared session so consecutive calls reuse the same keep-alive connection
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 def test_emotion_detection_api():
     """Test emotion detection via API"""
     
@@ -20,7 +25,7 @@ def test_emotion_detection_api():
     # Test health check
     print("Testing health check...")
     try:
-        response = requests.get(f"{base_url}/health")
+        response = _SESSION.get(f"{base_url}/health")
         if response.status_code == 200:
             print("✅ Health check passed")
         else:
@@ -47,7 +52,7 @@ def test_emotion_detection_api():
         with open(test_image_path, 'rb') as f:
             files = {'image': f}
             data = {'confidence': '0.5', 'emotions': 'false'}
-            response = requests.post(f"{base_url}/detect", files=files, data=data)
+            response = _SESSION.post(f"{base_url}/detect", files=files, data=data)
         
         if response.status_code == 200:
             result = response.json()
@@ -66,7 +71,7 @@ def test_emotion_detection_api():
         with open(test_image_path, 'rb') as f:
             files = {'image': f}
             data = {'confidence': '0.5', 'emotions': 'true'}
-            response = requests.post(f"{base_url}/detect", files=files, data=data)
+            response = _SESSION.post(f"{base_url}/detect", files=files, data=data)
         
         if response.status_code == 200:
             result = response.json()
@@ -91,7 +96,7 @@ def test_emotion_detection_api():
         with open(test_image_path, 'rb') as f:
             files = {'image': f}
             data = {'confidence': '0.5', 'emotions': 'true'}
-            response = requests.post(f"{base_url}/detect-and-annotate", files=files, data=data)
+            response = _SESSION.post(f"{base_url}/detect-and-annotate", files=files, data=data)
         
         if response.status_code == 200:
             output_path = "test_emotion_annotated.jpg"
@@ -5,6 +5,7 @@ Simple test script to verify the face detection system works
 
 import os
 import sys
+import traceback
 import numpy as np
 
 # Add src to Python path
@@ -25,6 +26,8 @@ def test_basic_functionality():
         # Test 1: Initialize components
         print("1. Initializing components...")
         face_detector = MTCNNFaceDetector(confidence_threshold=0.5)
+        # Warm up so Test 5 reports steady-state rather than first-call timing
+        face_detector.warm_up()
         image_processor = OpenCVImageProcessor()
         use_case = FaceDetectionUseCase(face_detector, image_processor)
         print("   ✓ Components initialized successfully")
@@ -44,16 +47,17 @@ def test_basic_functionality():
         
         # Test 4: Create a dummy image for testing
         print("4. Creating test image...")
-        dummy_image = np.random.randint(0, 255, (300, 300, 3), dtype=np.uint8)
-        test_image_path = "test_image.jpg"
-        image_processor.save_image(dummy_image, test_image_path)
+        dummy_image = np.random.default_rng(0).integers(0, 255, (300, 300, 3), dtype=np.uint8)
         print("   ✓ Test image created")
         
         # Test 5: Test face detection on dummy image
         print("5. Testing face detection...")
-        result = use_case.detect_faces_in_image(test_image_path)
+        # Both copies go through one batched MTCNN pass
+        result, batched_result = use_case.detect_faces_in_arrays([dummy_image, dummy_image])
         assert result is not None, "Detection result should not be None"
         assert result.processing_time > 0, "Processing time should be positive"
+        assert batched_result.get_face_count() == result.get_face_count(), \
+            "Identical images in one batch should give identical results"
         print(f"   ✓ Detection completed in {result.processing_time:.3f} seconds")
         print(f"   ✓ Found {result.get_face_count()} faces (expected 0 for random image)")
         
@@ -67,13 +71,9 @@ def test_basic_functionality():
         # Test 7: Test confidence threshold setting
         print("7. Testing confidence threshold...")
         face_detector.set_confidence_threshold(0.8)
-        result2 = use_case.detect_faces_in_image(test_image_path, confidence_threshold=0.3)
+        result2 = use_case.detect_faces_in_array(dummy_image, confidence_threshold=0.3)
         print("   ✓ Confidence threshold setting working")
         
-        # Cleanup
-        if os.path.exists(test_image_path):
-            os.remove(test_image_path)
-        
         print("\n🎉 All tests passed! The face detection system is working correctly.")
         print("\nNext steps:")
         print("1. Install dependencies: pip install -r requirements.txt")
@@ -84,8 +84,7 @@ def test_basic_functionality():
         
     except Exception as e:
         print(f"\n❌ Test failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        traceback.print_exception(type(e), e, e.__traceback__, limit=5)
         return False
 
 